@@ -0,0 +1,927 @@
+"""BACnet 읽기/쓰기 공용 헬퍼 (re2.py, re3.py 등에서 사용)"""
+
+import asyncio
+import atexit
+import copy
+import logging
+import math
+import queue
+import socket
+import sys
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from bacpypes3.local.device import DeviceObject
+from bacpypes3.pdu import Address, IPv4Address, GlobalBroadcast
+from bacpypes3.primitivedata import ObjectIdentifier, PropertyIdentifier, Real, Unsigned, Boolean, CharacterString, Enumerated
+from bacpypes3.primitivedata import TagClass, TagNumber, TagList
+from bacpypes3.apdu import ReadPropertyRequest, WritePropertyRequest, ReadPropertyMultipleRequest, WritePropertyMultipleRequest
+from bacpypes3.apdu import WhoIsRequest, ErrorRejectAbortNack
+from bacpypes3.errors import RejectException
+from bacpypes3.basetypes import ReadAccessSpecification, PropertyReference, WriteAccessSpecification, PropertyValue
+from bacpypes3.ipv4.app import NormalApplication
+from bacpypes3.constructeddata import Any
+
+# 디버깅 비활성화
+_debug = 0
+
+# 콘솔 출력 핸들러: 기본은 호출한 스레드에서 바로 기록 (print와 같은 순서로 출력됨)
+_console_handler = logging.StreamHandler(sys.stdout)
+_console_handler.setFormatter(logging.Formatter("%(message)s"))
+_log_handler = _console_handler
+_loggers = []
+
+# use_queued_logging() 이후에는 큐를 거쳐 별도 스레드에서 기록
+_log_queue = queue.SimpleQueue()
+_log_listener = None
+
+def get_logger(name):
+    """메시지만 그대로 출력하는 로거 반환"""
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.addHandler(_log_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _loggers.append(logger)
+    return logger
+
+def use_queued_logging():
+    """콘솔 기록을 큐와 별도 스레드로 넘김 (이벤트 루프가 출력에 막히지 않도록)
+    
+    print와 함께 쓰면 두 출력의 순서가 어긋나므로, 모든 출력을 로거로 하는
+    스크립트에서만 asyncio.run 전에 호출한다.
+    """
+    global _log_handler, _log_listener
+    if _log_listener is not None:
+        return
+    _log_listener = QueueListener(_log_queue, _console_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)  # 종료 시 남은 메시지 출력
+    
+    queue_handler = QueueHandler(_log_queue)
+    for logger in _loggers:
+        logger.removeHandler(_log_handler)
+        logger.addHandler(queue_handler)
+    _log_handler = queue_handler
+
+logger = get_logger(__name__)
+
+# 응용 태그 번호별 (BACnet 타입, 파이썬 타입)
+_VALUE_TYPES = {
+    TagNumber.boolean: (Boolean, bool),
+    TagNumber.unsigned: (Unsigned, int),
+    TagNumber.real: (Real, float),
+    TagNumber.characterString: (CharacterString, str),
+    TagNumber.enumerated: (Enumerated, int),
+}
+
+# 우선순위 배열 요소의 태그 번호별 타입
+_PRIORITY_TYPES = {
+    TagNumber.unsigned: (Unsigned, int),
+    TagNumber.real: (Real, float),
+    TagNumber.boolean: (Boolean, bool),
+}
+
+# 추출이 필요 없는 파이썬 기본 타입
+_PLAIN_TYPES = (bool, int, float, str)
+
+# 값 변환(cast_out) 실패 시 발생하는 예외 (디코딩 오류는 ValueError, 태그 불일치는 InvalidTag)
+_CAST_ERRORS = (TypeError, ValueError, AttributeError, RejectException)
+
+def application_tag(bacnet_value):
+    """Any 객체가 단일 응용 태그 값이면 그 태그를, 아니면 None 반환"""
+    tags = bacnet_value.tagList
+    if len(tags) == 3 and tags[0].tag_class == TagClass.opening:
+        tag = tags[1]  # 컨텍스트 여닫음 태그로 감싸진 값
+    elif len(tags) == 1:
+        tag = tags[0]
+    else:
+        return None
+    return tag if tag.tag_class == TagClass.application else None
+
+def is_null_value(value):
+    """값이 NULL인지 확인 (Null 응용 태그 여부, 읽기 오류는 NULL이 아님)"""
+    if value is None:
+        return True
+    if isinstance(value, BaseException):
+        return False
+    tag = application_tag(value)
+    return tag is not None and tag.tag_number == TagNumber.null
+
+def extract_priority_value(bacnet_value):
+    """우선순위 배열 요소에서 값 추출"""
+    if bacnet_value is None:
+        return "NULL"
+    
+    try:
+        # 태그 번호로 타입 결정 (NULL 포함)
+        tag = application_tag(bacnet_value)
+        if tag is not None:
+            if tag.tag_number == TagNumber.null:
+                return "NULL"
+            if tag.tag_number in _PRIORITY_TYPES:
+                bacnet_type, python_type = _PRIORITY_TYPES[tag.tag_number]
+                return python_type(bacnet_value.cast_out(bacnet_type))
+        
+        # 기타 처리 (문자열 표현)
+        return str(bacnet_value)
+    except _CAST_ERRORS:
+        return str(bacnet_value)
+
+def extract_value(bacnet_value):
+    """BACnet Any 객체에서 실제 값 추출 (읽기 오류는 None)"""
+    if bacnet_value is None or isinstance(bacnet_value, BaseException):
+        return None
+    
+    # 이미 파이썬 값(또는 값을 담은 객체)이면 변환 없이 반환
+    if isinstance(bacnet_value, _PLAIN_TYPES):
+        return bacnet_value
+    value = getattr(bacnet_value, "value", None)
+    if isinstance(value, _PLAIN_TYPES):
+        return value
+    
+    try:
+        # 태그 번호로 타입을 결정하고 한 번만 변환 (outOfService는 불린)
+        tag = application_tag(bacnet_value)
+        if tag is not None:
+            if tag.tag_number == TagNumber.null:
+                return None
+            if tag.tag_number in _VALUE_TYPES:
+                bacnet_type, python_type = _VALUE_TYPES[tag.tag_number]
+                return python_type(bacnet_value.cast_out(bacnet_type))
+        
+        # 직접 문자열 변환 시도
+        return str(bacnet_value)
+        
+    except _CAST_ERRORS:
+        return f"값 추출 실패: {bacnet_value}"
+
+# 대상별 식별자/주소 객체 캐시
+@lru_cache(maxsize=256)
+def _object_identifier(object_id):
+    return ObjectIdentifier(object_id)
+
+def get_object_identifier(object_id):
+    """object_id 튜플에 대한 ObjectIdentifier (캐시, 이미 ObjectIdentifier면 그대로 반환)"""
+    if isinstance(object_id, ObjectIdentifier):
+        return object_id
+    return _object_identifier(object_id)
+
+@lru_cache(maxsize=256)
+def get_address(device_address):
+    """장치 주소 문자열에 대한 Address (캐시)"""
+    return Address(device_address)
+
+# (객체, 속성, 배열 인덱스)별 ReadPropertyRequest 템플릿
+@lru_cache(maxsize=1024)
+def _read_request_template(object_id, property_id, property_index=None):
+    """주소가 없는 읽기 요청 템플릿 (캐시)"""
+    return ReadPropertyRequest(
+        objectIdentifier=get_object_identifier(object_id),
+        propertyIdentifier=property_id,
+        propertyArrayIndex=property_index
+    )
+
+def make_read_request(device_address, object_id, property_id, property_index=None):
+    """캐시된 템플릿을 복사해 ReadPropertyRequest 생성 (요청마다 새 PDU)"""
+    request = copy.copy(_read_request_template(object_id, property_id, property_index))
+    request.pduDestination = get_address(device_address)
+    return request
+
+# (객체, 속성)별 WritePropertyRequest 템플릿
+@lru_cache(maxsize=1024)
+def _write_request_template(object_id, property_id):
+    """값/주소가 없는 쓰기 요청 템플릿 (캐시)"""
+    return WritePropertyRequest(
+        objectIdentifier=get_object_identifier(object_id),
+        propertyIdentifier=property_id
+    )
+
+def make_write_request(device_address, object_id, property_id, property_value=None, priority=None):
+    """캐시된 템플릿을 복사해 WritePropertyRequest 생성 (요청마다 새 PDU)"""
+    request = copy.copy(_write_request_template(object_id, property_id))
+    if property_value is not None:
+        request.propertyValue = property_value
+    if priority is not None:
+        request.priority = priority
+    request.pduDestination = get_address(device_address)
+    return request
+
+def install_uvloop():
+    """uvloop이 설치되어 있으면 asyncio 이벤트 루프로 사용 (선택 사항)"""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    uvloop.install()
+    return True
+
+class DiscoveryApplication(NormalApplication):
+    """받은 I-Am을 등록된 큐들로 전달하는 NormalApplication"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.i_am_queues = set()
+    
+    async def do_IAmRequest(self, apdu):
+        await super().do_IAmRequest(apdu)
+        for i_am_queue in self.i_am_queues:
+            i_am_queue.put_nowait(apdu)
+
+# 마지막 I-Am 이후 이 시간(초) 동안 응답이 없으면 검색 종료
+DISCOVERY_IDLE_TIMEOUT = 0.3
+
+async def discover_i_am(app, low_limit=None, high_limit=None, address=None, idle_timeout=DISCOVERY_IDLE_TIMEOUT):
+    """Who-Is를 보내고 I-Am 응답을 도착하는 대로 내보내는 비동기 제너레이터
+    
+    app은 DiscoveryApplication이어야 한다 (get_app()이 만드는 애플리케이션).
+    address를 지정하지 않으면 전역 브로드캐스트로 보낸다.
+    """
+    i_am_queue = asyncio.Queue()
+    app.i_am_queues.add(i_am_queue)
+    try:
+        request = WhoIsRequest(destination=address or GlobalBroadcast())
+        if low_limit is not None:
+            request.deviceInstanceRangeLowLimit = low_limit
+            request.deviceInstanceRangeHighLimit = high_limit
+        app.request(request)  # 확인 응답이 없는 요청
+        
+        while True:
+            try:
+                yield await asyncio.wait_for(i_am_queue.get(), idle_timeout)
+            except asyncio.TimeoutError:
+                break
+    finally:
+        app.i_am_queues.discard(i_am_queue)
+
+# 공유 애플리케이션 (최초 요청 시 생성)
+_app = None
+_app_lock = asyncio.Lock()
+
+# UDP 소켓 송수신 버퍼 크기 (동시 읽기 응답이 몰려도 커널에서 버려지지 않도록)
+# 실제 크기는 /proc/sys/net/core/rmem_max, wmem_max 값으로 제한되므로 필요하면 함께 올림
+SOCKET_RCVBUF = 4 << 20
+SOCKET_SNDBUF = 1 << 20
+
+async def tune_socket(app):
+    """애플리케이션 UDP 소켓의 송수신 버퍼 키우기 (지원하지 않으면 기본값 유지)"""
+    server = app.normal.server
+    
+    # 소켓은 비동기로 만들어지므로 생성이 끝날 때까지 대기
+    await asyncio.gather(*getattr(server, "_transport_tasks", ()), return_exceptions=True)
+    if server.local_transport is None:
+        return
+    
+    sock = server.local_transport.get_extra_info("socket")
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RCVBUF)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SNDBUF)
+    except OSError as e:
+        logger.info(f"소켓 버퍼 설정 실패: {e}")
+
+# 로컬 장치 인스턴스 번호 (같은 네트워크의 여러 호스트에서 동시에 실행하면 호스트마다 다르게)
+LOCAL_DEVICE_ID = 599
+
+async def get_app(object_name="BACnet Client", device_id=LOCAL_DEVICE_ID):
+    """공유 NormalApplication 반환 (없으면 object_name, device_id로 생성)"""
+    global _app
+    async with _app_lock:
+        if _app is None:
+            device = DeviceObject(
+                objectName=object_name,
+                objectIdentifier=("device", device_id),
+                maxApduLengthAccepted=1024,
+                segmentationSupported="segmentedBoth",
+                vendorIdentifier=15
+            )
+            _app = DiscoveryApplication(device, IPv4Address("200.0.0.234/24"))
+            await tune_socket(_app)
+    return _app
+
+def close_app():
+    """공유 애플리케이션의 소켓 닫기 (이벤트 루프가 살아 있을 때 호출)"""
+    global _app
+    if _app is not None:
+        _app.close()
+        _app = None
+
+@asynccontextmanager
+async def app_session(object_name="BACnet Client", device_id=LOCAL_DEVICE_ID):
+    """공유 애플리케이션을 열고 블록이 끝나면 소켓 닫기"""
+    app = await get_app(object_name, device_id)
+    try:
+        yield app
+    finally:
+        close_app()
+
+# 장치별 동시 요청 수 제한 (컨트롤러에 따라 조정)
+MAX_REQUESTS_PER_DEVICE = 4
+_DEVICE_SEMAPHORES = defaultdict(lambda: asyncio.Semaphore(MAX_REQUESTS_PER_DEVICE))
+
+def get_device_semaphore(device_address):
+    """장치별 동시 요청 수를 제한하는 세마포어 반환"""
+    return _DEVICE_SEMAPHORES[device_address]
+
+def configure_concurrency(device_address, limit):
+    """특정 장치의 동시 요청 수 변경 (이미 진행 중인 요청에는 영향 없음)"""
+    _DEVICE_SEMAPHORES[device_address] = asyncio.Semaphore(limit)
+
+# 응답 대기 시간 (LAN에서 정상 응답은 100ms 이내이므로 1초가 지나면 유실로 보고 다시 보냄)
+REQUEST_TIMEOUT = 1.0
+REQUEST_TRIES = 2
+REQUEST_BACKOFF = 2.0
+
+async def request_with_retries(app, request, timeout=REQUEST_TIMEOUT, tries=REQUEST_TRIES, backoff=REQUEST_BACKOFF):
+    """요청 전송 (제한 시간 안에 응답이 없으면 제한 시간을 backoff배로 늘려 다시 보냄)"""
+    for attempt in range(tries):
+        try:
+            # 매번 새 사본을 보내 새 invoke ID를 받도록 함
+            return await asyncio.wait_for(app.request(copy.copy(request)), timeout)
+        except asyncio.TimeoutError:
+            if attempt == tries - 1:
+                raise
+            timeout *= backoff
+
+async def read_property(app, device_address, object_id, property_id, property_index=None):
+    """BACnet 속성 읽기 함수"""
+    try:
+        # 템플릿 복사로 요청 구성 (property_index가 None이면 배열 인덱스 없음)
+        request = make_read_request(device_address, object_id, property_id, property_index)
+        
+        # 같은 장치로 동시에 나가는 요청 수 제한
+        async with _DEVICE_SEMAPHORES[device_address]:
+            response = await app.request(request)
+        return response.propertyValue  # 원본 값 반환 (실패는 예외로 전달됨)
+    except (asyncio.TimeoutError, AttributeError, ErrorRejectAbortNack) as e:
+        logger.info(f"읽기 오류 ({object_id}.{property_id}): {e}")
+        return None
+    except Exception as e:
+        logger.exception(f"읽기 오류 ({object_id}.{property_id}): {e}")
+        return None
+
+# 쓰기 후 확인 읽기: 값이 아직 반영되지 않았으면 짧게 재시도
+CONFIRM_RETRIES = 5
+CONFIRM_INTERVAL = 0.05
+
+def same_value(value, expected):
+    """읽은 값과 기대 값 비교 (Real은 단정밀도이므로 근사 비교)"""
+    if isinstance(value, float) and isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        return math.isclose(value, expected, rel_tol=1e-6)
+    return value == expected
+
+async def read_confirmed(app, device_address, object_id, property_id, expected=None):
+    """쓰기 결과 확인용 읽기 (expected가 있으면 일치할 때까지 재시도)"""
+    value = extract_value(await read_property(app, device_address, object_id, property_id))
+    if expected is None:
+        return value
+    
+    for _ in range(CONFIRM_RETRIES - 1):
+        if same_value(value, expected):
+            break
+        await asyncio.sleep(CONFIRM_INTERVAL)
+        value = extract_value(await read_property(app, device_address, object_id, property_id))
+    return value
+
+class PropertyReadError(Exception):
+    """ReadPropertyMultiple 응답에서 속성별로 돌아온 오류 (NULL 값과 구분하기 위해 값 대신 반환)"""
+    
+    def __init__(self, error):
+        super().__init__(f"{error.errorClass}: {error.errorCode}")
+        self.error = error
+
+def read_access_value(read_result):
+    """ReadPropertyMultiple 결과 요소의 값 (속성 오류면 PropertyReadError)"""
+    if read_result.propertyAccessError is not None:
+        return PropertyReadError(read_result.propertyAccessError)
+    return read_result.propertyValue
+
+async def read_property_multiple(app, device_address, object_id, props):
+    """ReadPropertyMultiple로 여러 속성을 한 번에 읽기
+    
+    props는 (속성, 배열 인덱스) 튜플 목록이며, 결과는 같은 키의 딕셔너리로
+    반환한다. 읽기에 실패한 속성의 값은 PropertyReadError, 요청 자체가 실패하면
+    None 반환.
+    """
+    try:
+        request = ReadPropertyMultipleRequest(
+            listOfReadAccessSpecs=[
+                ReadAccessSpecification(
+                    objectIdentifier=get_object_identifier(object_id),
+                    listOfPropertyReferences=[
+                        PropertyReference(propertyIdentifier=prop, propertyArrayIndex=index)
+                        for prop, index in props
+                    ]
+                )
+            ]
+        )
+        request.pduDestination = get_address(device_address)
+        
+        response = await app.request(request)
+        if not response:
+            return None
+        
+        # 응답의 속성 식별자를 요청한 키로 되돌리기
+        keys = {(PropertyIdentifier(prop), index): (prop, index) for prop, index in props}
+        results = dict.fromkeys(props)
+        for element in response.listOfReadAccessResults[0].listOfResults:
+            key = keys.get((element.propertyIdentifier, element.propertyArrayIndex))
+            if key is not None:
+                results[key] = read_access_value(element.readResult)
+        return results
+    except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+        logger.info(f"다중 읽기 오류 ({object_id}): {e}")
+        return None
+    except Exception as e:
+        logger.exception(f"다중 읽기 오류 ({object_id}): {e}")
+        return None
+
+# 읽기 묶음: 요청이 처리 중일 때 더 모으는 시간(초)과 한 번에 보내는 최대 속성 수
+BATCH_FLUSH_DELAY = 0.005
+BATCH_MAX_PROPERTIES = 32
+
+class ReadBatcher:
+    """동시에 들어온 읽기를 장치별 ReadPropertyMultiple 하나로 묶어 전송
+    
+    장치로 나간 묶음이 없으면 같은 루프 차례에 모인 읽기만 바로 보내고,
+    처리 중인 묶음이 있으면 BATCH_FLUSH_DELAY 동안 더 모은다. RPM이 거부되면
+    묶인 읽기를 read_property로 하나씩 다시 보낸다.
+    """
+    
+    def __init__(self, app, flush_delay=BATCH_FLUSH_DELAY, max_properties=BATCH_MAX_PROPERTIES):
+        self.app = app
+        self.flush_delay = flush_delay
+        self.max_properties = max_properties
+        self._pending = {}  # 장치 주소 -> [(객체, 속성, 배열 인덱스, future)]
+        self._timers = {}
+        self._in_flight = defaultdict(int)
+    
+    def read(self, device_address, object_id, property_id, property_index=None):
+        """읽기를 예약하고 값(Any, 속성 오류는 PropertyReadError, 실패 시 None)을 받을 future 반환"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(device_address, [])
+        pending.append((object_id, property_id, property_index, future))
+        
+        if len(pending) >= self.max_properties:
+            self._flush(device_address)
+        elif device_address not in self._timers:
+            # 처리 중인 요청이 없으면 지연 없이 (같은 차례에 모인 것만) 전송
+            delay = self.flush_delay if self._in_flight[device_address] else 0
+            self._timers[device_address] = loop.call_later(delay, self._flush, device_address)
+        return future
+    
+    def _flush(self, device_address):
+        """모인 읽기를 하나의 요청으로 전송"""
+        timer = self._timers.pop(device_address, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(device_address, None)
+        if batch:
+            asyncio.ensure_future(self._send(device_address, batch))
+    
+    async def _send(self, device_address, batch):
+        """묶음 전송 후 결과를 각 future로 전달"""
+        self._in_flight[device_address] += 1
+        try:
+            keys = [(object_id, property_id, index) for object_id, property_id, index, _ in batch]
+            values = await self._read_multiple(device_address, keys)
+            if values is None:
+                values = dict(zip(keys, await asyncio.gather(
+                    *[read_property(self.app, device_address, *key) for key in keys]
+                )))
+            for key, (*_, future) in zip(keys, batch):
+                if not future.done():
+                    future.set_result(values.get(key))
+        except BaseException as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            self._in_flight[device_address] -= 1
+    
+    async def _read_multiple(self, device_address, keys):
+        """여러 객체의 속성을 ReadPropertyMultiple 하나로 읽기 (실패 시 None)"""
+        # 객체별 속성 참조 (요청 순서 유지, 중복 제거)
+        refs = {}
+        for object_id, property_id, index in keys:
+            refs.setdefault(object_id, {})[(PropertyIdentifier(property_id), index)] = (object_id, property_id, index)
+        
+        try:
+            request = ReadPropertyMultipleRequest(
+                listOfReadAccessSpecs=[
+                    ReadAccessSpecification(
+                        objectIdentifier=get_object_identifier(object_id),
+                        listOfPropertyReferences=[
+                            PropertyReference(propertyIdentifier=prop, propertyArrayIndex=index)
+                            for prop, index in props
+                        ]
+                    )
+                    for object_id, props in refs.items()
+                ]
+            )
+            request.pduDestination = get_address(device_address)
+            
+            async with _DEVICE_SEMAPHORES[device_address]:
+                response = await self.app.request(request)
+            
+            # 결과는 요청한 객체 순서대로 돌아옴
+            values = {}
+            for props, result in zip(refs.values(), response.listOfReadAccessResults):
+                for element in result.listOfResults:
+                    key = props.get((element.propertyIdentifier, element.propertyArrayIndex))
+                    if key is not None:
+                        values[key] = read_access_value(element.readResult)
+            return values
+        except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+            logger.info(f"묶음 읽기 오류 ({device_address}): {e}")
+            return None
+        except Exception as e:
+            logger.exception(f"묶음 읽기 오류 ({device_address}): {e}")
+            return None
+
+# 애플리케이션별 ReadBatcher
+_BATCHERS = weakref.WeakKeyDictionary()
+
+def get_batcher(app):
+    """애플리케이션의 공유 ReadBatcher 반환 (없으면 생성)"""
+    batcher = _BATCHERS.get(app)
+    if batcher is None:
+        batcher = _BATCHERS[app] = ReadBatcher(app)
+    return batcher
+
+async def read_batched(app, device_address, object_id, property_id, property_index=None):
+    """ReadBatcher를 거쳐 속성 읽기 (동시에 호출된 읽기는 한 요청으로 묶임)"""
+    return await get_batcher(app).read(device_address, object_id, property_id, property_index)
+
+# 파이썬 타입별 BACnet 타입 (정확한 타입으로 조회하므로 bool이 int로 잡히지 않음)
+_ENCODERS = {
+    bool: Boolean,
+    int: Unsigned,
+    float: Real,
+    str: CharacterString,
+}
+
+@lru_cache(maxsize=256)
+def encode_as(bacnet_type, value):
+    """값을 지정한 BACnet 타입의 쓰기용 Any 객체로 변환
+    
+    Any는 만들 때 인코딩되므로 같은 값(설정값 유지, 해제 등)을 반복해서 쓰면
+    캐시된 객체를 그대로 재사용한다 (반환된 객체는 수정하지 말 것).
+    """
+    return Any(bacnet_type(value))
+
+def encode_value(value):
+    """파이썬 값을 쓰기용 Any 객체로 변환"""
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        return Any(CharacterString(str(value)))
+    return encode_as(encoder, value)
+
+async def write_property(app, device_address, object_id, property_id, value, priority=None):
+    """BACnet 속성 쓰기 함수"""
+    try:
+        # 템플릿 복사로 쓰기 요청 생성
+        request = make_write_request(device_address, object_id, property_id, encode_value(value), priority)
+        
+        # 요청 전송 (실패는 예외로 전달됨)
+        await app.request(request)
+        return True
+        
+    except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+        logger.info(f"쓰기 오류 ({object_id}.{property_id}): {e}")
+        return False
+    except Exception as e:
+        logger.exception(f"쓰기 오류 ({object_id}.{property_id}): {e}")
+        return False
+
+async def write_property_multiple(app, device_address, writes, priority=None):
+    """WritePropertyMultiple로 여러 객체/속성을 한 번에 쓰기
+    
+    writes는 (객체, 속성, 값) 튜플 목록이며, 같은 객체의 속성은 하나의
+    WriteAccessSpecification으로 묶는다. 장치가 모두 받아들이면 True 반환.
+    """
+    try:
+        # 객체별로 속성 값 묶기 (순서 유지)
+        properties = {}
+        for object_id, property_id, value in writes:
+            properties.setdefault(object_id, []).append(
+                PropertyValue(propertyIdentifier=property_id, value=encode_value(value), priority=priority)
+            )
+        
+        request = WritePropertyMultipleRequest(
+            listOfWriteAccessSpecs=[
+                WriteAccessSpecification(
+                    objectIdentifier=get_object_identifier(object_id),
+                    listOfProperties=values
+                )
+                for object_id, values in properties.items()
+            ]
+        )
+        request.pduDestination = get_address(device_address)
+        
+        response = await app.request(request)
+        return response is not None
+        
+    except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+        logger.info(f"다중 쓰기 오류 ({device_address}): {e}")
+        return False
+    except Exception as e:
+        logger.exception(f"다중 쓰기 오류 ({device_address}): {e}")
+        return False
+
+# 쓰기 묶음: 한 번에 보내는 최대 쓰기 수 (모으는 시간은 BATCH_FLUSH_DELAY)
+WRITE_BATCH_MAX = 16
+
+class WriteBatcher:
+    """동시에 들어온 쓰기를 장치별 WritePropertyMultiple 하나로 묶어 전송
+    
+    모으는 방식은 ReadBatcher와 같다. 쓰기가 하나뿐이면 WriteProperty로 보내고,
+    WPM이 실패하면(미지원, 일부 속성 거부 등) 묶인 쓰기를 하나씩 다시 보낸다.
+    """
+    
+    def __init__(self, app, flush_delay=BATCH_FLUSH_DELAY, max_writes=WRITE_BATCH_MAX):
+        self.app = app
+        self.flush_delay = flush_delay
+        self.max_writes = max_writes
+        self._pending = {}  # 장치 주소 -> [(객체, 속성, Any 값, 우선순위, future)]
+        self._timers = {}
+        self._in_flight = defaultdict(int)
+    
+    def write(self, device_address, object_id, property_id, value, priority=None):
+        """쓰기를 예약하고 성공 여부를 받을 future 반환 (value는 파이썬 값 또는 Any)"""
+        if not isinstance(value, Any):
+            value = encode_value(value)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(device_address, [])
+        pending.append((object_id, property_id, value, priority, future))
+        
+        if len(pending) >= self.max_writes:
+            self._flush(device_address)
+        elif device_address not in self._timers:
+            # 처리 중인 요청이 없으면 지연 없이 (같은 차례에 모인 것만) 전송
+            delay = self.flush_delay if self._in_flight[device_address] else 0
+            self._timers[device_address] = loop.call_later(delay, self._flush, device_address)
+        return future
+    
+    def _flush(self, device_address):
+        """모인 쓰기를 하나의 요청으로 전송"""
+        timer = self._timers.pop(device_address, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(device_address, None)
+        if batch:
+            asyncio.ensure_future(self._send(device_address, batch))
+    
+    async def _send(self, device_address, batch):
+        """묶음 전송 후 결과를 각 future로 전달"""
+        self._in_flight[device_address] += 1
+        try:
+            writes = [item[:4] for item in batch]
+            if len(writes) > 1 and await self._write_multiple(device_address, writes):
+                results = [True] * len(writes)
+            else:
+                results = await asyncio.gather(*[self._write_one(device_address, *write) for write in writes])
+            for result, (*_, future) in zip(results, batch):
+                if not future.done():
+                    future.set_result(result)
+        except BaseException as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            self._in_flight[device_address] -= 1
+    
+    async def _write_one(self, device_address, object_id, property_id, value, priority):
+        """WriteProperty 하나 전송 (성공 시 True)"""
+        try:
+            request = make_write_request(device_address, object_id, property_id, value, priority)
+            async with _DEVICE_SEMAPHORES[device_address]:
+                await self.app.request(request)
+            return True
+        except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+            logger.info(f"쓰기 오류 ({object_id}.{property_id}): {e}")
+            return False
+        except Exception as e:
+            logger.exception(f"쓰기 오류 ({object_id}.{property_id}): {e}")
+            return False
+    
+    async def _write_multiple(self, device_address, writes):
+        """여러 쓰기를 WritePropertyMultiple 하나로 전송 (장치가 모두 받아들이면 True)"""
+        # 객체별로 속성 값 묶기 (순서 유지)
+        properties = {}
+        for object_id, property_id, value, priority in writes:
+            properties.setdefault(object_id, []).append(
+                PropertyValue(propertyIdentifier=property_id, value=value, priority=priority)
+            )
+        
+        try:
+            request = WritePropertyMultipleRequest(
+                listOfWriteAccessSpecs=[
+                    WriteAccessSpecification(
+                        objectIdentifier=get_object_identifier(object_id),
+                        listOfProperties=values
+                    )
+                    for object_id, values in properties.items()
+                ]
+            )
+            request.pduDestination = get_address(device_address)
+            
+            async with _DEVICE_SEMAPHORES[device_address]:
+                await self.app.request(request)
+            return True
+        except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+            logger.info(f"묶음 쓰기 오류 ({device_address}): {e}")
+            return False
+        except Exception as e:
+            logger.exception(f"묶음 쓰기 오류 ({device_address}): {e}")
+            return False
+
+# 애플리케이션별 WriteBatcher
+_WRITE_BATCHERS = weakref.WeakKeyDictionary()
+
+def get_write_batcher(app):
+    """애플리케이션의 공유 WriteBatcher 반환 (없으면 생성)"""
+    batcher = _WRITE_BATCHERS.get(app)
+    if batcher is None:
+        batcher = _WRITE_BATCHERS[app] = WriteBatcher(app)
+    return batcher
+
+async def write_batched(app, device_address, object_id, property_id, value, priority=None):
+    """WriteBatcher를 거쳐 속성 쓰기 (동시에 호출된 쓰기는 한 요청으로 묶임, 성공 시 True)"""
+    return await get_write_batcher(app).write(device_address, object_id, property_id, value, priority)
+
+async def read_whole_priority_array(app, device_address, object_id):
+    """priorityArray 전체를 한 번에 읽어 요소별 Any 목록(1-16) 반환
+    
+    장치가 거부하거나(APDU 크기, 세그먼트 미지원 등) 요소가 단일 응용 태그가
+    아니어서 나눌 수 없으면 None 반환.
+    """
+    try:
+        request = make_read_request(device_address, object_id, "priorityArray")
+        async with _DEVICE_SEMAPHORES[device_address]:
+            response = await app.request(request)
+        if not response:
+            return None
+        tags = response.propertyValue.tagList.tagList
+    except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+        # 장치 거부는 요소별 읽기로 넘어가는 정상 경로
+        logger.info(f"우선순위 배열 전체 읽기 실패 ({object_id}): {e}")
+        return None
+    except Exception as e:
+        logger.exception(f"우선순위 배열 전체 읽기 오류 ({object_id}): {e}")
+        return None
+    
+    # 컨텍스트 여닫음 태그 제거 후 16개 응용 태그인지 확인
+    if tags and tags[0].tag_class == TagClass.opening:
+        tags = tags[1:-1]
+    if len(tags) != 16 or any(tag.tag_class != TagClass.application for tag in tags):
+        return None
+    return [Any(TagList([tag])) for tag in tags]
+
+async def read_priority_values(app, device_address, object_id):
+    """우선순위 배열 요소(1-16)를 출력 없이 읽기 (요소별 Any 또는 예외 목록)"""
+    # 배열 전체를 한 번에 읽고, 안 되면 각 요소를 동시에 요청
+    priority_values_raw = await read_whole_priority_array(app, device_address, object_id)
+    if priority_values_raw is None:
+        priority_values_raw = await asyncio.gather(
+            *[read_property(app, device_address, object_id, "priorityArray", i) for i in range(1, 17)],
+            return_exceptions=True
+        )
+    return priority_values_raw
+
+# priorityArray 1-16을 ReadPropertyMultiple 한 번에 읽기 위한 속성 참조 목록
+_PRIORITY_PROPS = [("priorityArray", i) for i in range(1, 17)]
+
+# 현재 값과 우선순위 배열을 함께 읽기 위한 속성 참조 목록
+_VERIFY_PROPS = [("presentValue", None)] + _PRIORITY_PROPS
+
+# 인덱스별로 읽을 때 동시에 보내는 요청 수
+PRIORITY_READ_CHUNK = 4
+
+async def read_priority_array_by_index(app, device_address, object_id):
+    """priorityArray 1-16을 인덱스별로 읽기 (PRIORITY_READ_CHUNK개씩 동시에 전송)"""
+    priority_values_raw = []
+    for start in range(1, 17, PRIORITY_READ_CHUNK):
+        priority_values_raw += await asyncio.gather(*(
+            read_property(app, device_address, object_id, "priorityArray", i)
+            for i in range(start, start + PRIORITY_READ_CHUNK)
+        ))
+    return priority_values_raw
+
+async def read_priority_slots(app, device_address, object_id):
+    """priorityArray 1-16 읽기 (ReadPropertyMultiple 한 번, 지원하지 않으면 인덱스별로)"""
+    values = await read_property_multiple(app, device_address, object_id, _PRIORITY_PROPS)
+    if values is not None:
+        return [values[prop] for prop in _PRIORITY_PROPS]
+    return await read_priority_array_by_index(app, device_address, object_id)
+
+async def read_value_and_priorities(app, device_address, object_id):
+    """presentValue와 priorityArray 1-16을 함께 읽어 (현재 값, 우선순위 값 목록) 반환"""
+    values = await read_property_multiple(app, device_address, object_id, _VERIFY_PROPS)
+    if values is not None:
+        return values[("presentValue", None)], [values[prop] for prop in _PRIORITY_PROPS]
+    current_value_raw, priority_values_raw = await asyncio.gather(
+        read_property(app, device_address, object_id, "presentValue"),
+        read_priority_array_by_index(app, device_address, object_id)
+    )
+    return current_value_raw, priority_values_raw
+
+# 쓰기 후 값 반영 확인 (첫 확인 간격, 최대 대기 시간)
+SETTLE_FIRST_DELAY = 0.02
+SETTLE_TIMEOUT = 0.5
+
+async def wait_settled(app, device_address, object_id, expected, timeout=SETTLE_TIMEOUT):
+    """presentValue가 expected가 될 때까지 확인 (간격은 두 배씩 증가, 최대 timeout)"""
+    async def poll():
+        delay = SETTLE_FIRST_DELAY
+        while True:
+            value = extract_value(await read_property(app, device_address, object_id, "presentValue"))
+            if value is None or same_value(value, expected):
+                return
+            await asyncio.sleep(delay)
+            delay *= 2
+    
+    try:
+        await asyncio.wait_for(poll(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+async def read_priority_array(app, device_address, object_id):
+    """presentValue의 우선순위 배열 읽기 (개선 버전)"""
+    try:
+        priority_values_raw = await read_priority_values(app, device_address, object_id)
+        return print_priority_array(priority_values_raw)
+    except Exception as e:
+        logger.exception(f"우선순위 배열 읽기 오류: {e}")
+        return None
+
+def format_priority_array(priority_values_raw):
+    """읽어 온 우선순위 배열 요소(1-16 순서)를 보고서 문자열로 만들어 (보고서, 활성 우선순위 목록) 반환"""
+    lines = ["", "우선순위 배열:"]
+    active_priorities = []
+    
+    for i, priority_value_raw in enumerate(priority_values_raw, 1):
+        if isinstance(priority_value_raw, BaseException):
+            lines.append(f"  우선순위 {i}: 읽기 오류 ({priority_value_raw})")
+            continue
+        
+        priority_value = extract_priority_value(priority_value_raw)
+        
+        if priority_value != "NULL":
+            active_priorities.append((i, priority_value))
+            lines.append(f"  우선순위 {i}: {priority_value} [활성]")
+        else:
+            lines.append(f"  우선순위 {i}: NULL")
+    
+    # 활성화된 우선순위 요약
+    if active_priorities:
+        lines.append("\n활성화된 우선순위:")
+        for priority, value in active_priorities:
+            lines.append(f"  우선순위 {priority}: {value}")
+        
+        # 가장 높은 우선순위 (번호 순으로 추가했으므로 첫 항목)
+        highest_priority = active_priorities[0]
+        lines.append(f"\n현재 제어 중인 우선순위: {highest_priority[0]} (값: {highest_priority[1]})")
+    else:
+        lines.append("\n활성화된 우선순위가 없습니다. (모두 NULL)")
+    
+    return "\n".join(lines), active_priorities
+
+def print_priority_array(priority_values_raw):
+    """읽어 온 우선순위 배열 요소(1-16 순서)를 출력하고 활성 우선순위 목록 반환"""
+    try:
+        # 보고서를 모아 한 번에 기록
+        report, active_priorities = format_priority_array(priority_values_raw)
+        logger.info(report)
+        return active_priorities
+    except Exception as e:
+        logger.exception(f"우선순위 배열 출력 오류: {e}")
+        return None
+
+def print_priority_values(priority_values_raw):
+    """우선순위 배열 요소(1-16 순서)를 값 그대로 출력 (읽기 오류는 따로 표시)"""
+    # 줄을 모아 한 번에 출력
+    print("\n".join(
+        f"  우선순위 {i}: 읽기 오류 ({priority_value_raw})" if isinstance(priority_value_raw, BaseException)
+        else f"  우선순위 {i}: {extract_value(priority_value_raw)}"
+        for i, priority_value_raw in enumerate(priority_values_raw, 1)
+    ))
+
+async def show_priority_array(app, device_address, object_id):
+    """우선순위 배열 1-16 출력"""
+    print_priority_values(await read_priority_slots(app, device_address, object_id))
+
+async def verify_and_dump(app, device_address, object_id, label="설정 후", expected=None):
+    """현재 값과 우선순위 배열을 한 번에 읽어 출력 (expected가 있으면 반영될 때까지 대기)"""
+    if expected is not None:
+        await wait_settled(app, device_address, object_id, expected)
+    
+    current_value_raw, priority_values_raw = await read_value_and_priorities(app, device_address, object_id)
+    print(f"{label} 값: {extract_value(current_value_raw)}")
+    print(f"\n{label} 우선순위 배열:")
+    print_priority_values(priority_values_raw)
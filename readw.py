@@ -1,126 +1,172 @@
 #!/usr/bin/env python3
 
 import asyncio
+import struct
 from bacpypes3.debugging import bacpypes_debugging, ModuleLogger
 from bacpypes3.argparse import SimpleArgumentParser
 from bacpypes3.app import Application
-from bacpypes3.local.device import DeviceObject
-from bacpypes3.pdu import Address, IPv4Address
-from bacpypes3.primitivedata import ObjectIdentifier
-from bacpypes3.apdu import ReadPropertyRequest, WritePropertyRequest
-from bacpypes3.ipv4.app import NormalApplication
+from bacpypes3.primitivedata import Real, Unsigned, CharacterString, Boolean, Enumerated
+from bacpypes3.primitivedata import TagNumber
+from bacpypes3.basetypes import EngineeringUnits
+from bacpypes3.errors import RejectException
+from bacpypes3.apdu import WritePropertyRequest, AbortPDU, RejectPDU, ErrorRejectAbortNack
+from bacnet_utils import (
+    get_app, close_app, install_uvloop, get_device_semaphore, application_tag,
+    get_object_identifier, get_address, make_read_request, encode_value,
+    read_property_multiple, write_property_multiple, discover_i_am
+)
 
 # 로깅 설정
 _debug = 0
 _log = ModuleLogger(globals())
 
+# 단위 번호 -> 단위 이름
+_UNITS_MAP = {
+    95: "degrees-celsius",
+    96: "degrees-fahrenheit",
+    98: "degrees-kelvin",
+    5: "amperes",
+    4: "volts",
+    74: "kilowatts",
+    19: "cubic-feet-per-minute",
+    159: "no-units",
+    62: "percent",
+    # 더 많은 단위들...
+}
+
+# 단위 번호로 바로 인덱싱하는 이름 표 (0-255, 없는 번호는 None)
+_UNITS_ARRAY = tuple(_UNITS_MAP.get(number) for number in range(256))
+
+def _units_name(number):
+    """단위 번호를 단위 이름으로 변환 (모르는 번호는 unit-N)"""
+    name = _UNITS_ARRAY[number] if 0 <= number < 256 else None
+    return name if name is not None else f"unit-{number}"
+
+# getattr 기본값 (속성이 없음을 None과 구분)
+_MISSING = object()
+
+# 응용 태그 번호별 (BACnet 타입, 파이썬 타입)
+_EXTRACTORS = {
+    TagNumber.real: (Real, float),
+    TagNumber.unsigned: (Unsigned, int),
+    TagNumber.characterString: (CharacterString, str),
+    TagNumber.boolean: (Boolean, bool),
+    TagNumber.enumerated: (Enumerated, int),  # units 등
+}
+
 def extract_value(bacnet_value):
     """BACnet Any 객체에서 실제 값 추출"""
     if bacnet_value is None:
         return None
     
     try:
-        # 가장 일반적인 방법들 시도
-        if hasattr(bacnet_value, 'value'):
-            return bacnet_value.value
-        
-        # 타입별 캐스팅 시도
-        from bacpypes3.primitivedata import Real, Unsigned, CharacterString, Boolean, Enumerated
-        from bacpypes3.basetypes import EngineeringUnits
-        
-        # 실수형 시도
-        try:
-            real_val = bacnet_value.cast_out(Real)
-            if real_val is not None:
-                return float(real_val)
-        except:
-            pass
-        
-        # 정수형 시도
-        try:
-            uint_val = bacnet_value.cast_out(Unsigned)
-            if uint_val is not None:
-                return int(uint_val)
-        except:
-            pass
-        
-        # 문자열 시도
-        try:
-            str_val = bacnet_value.cast_out(CharacterString)
-            if str_val is not None:
-                return str(str_val)
-        except:
-            pass
-        
-        # 불린형 시도
-        try:
-            bool_val = bacnet_value.cast_out(Boolean)
-            if bool_val is not None:
-                return bool(bool_val)
-        except:
-            pass
-        
-        # 열거형 시도 (units 등)
-        try:
-            enum_val = bacnet_value.cast_out(Enumerated)
-            if enum_val is not None:
-                return int(enum_val)
-        except:
-            pass
-        
-        # EngineeringUnits 시도
-        try:
-            units_val = bacnet_value.cast_out(EngineeringUnits)
-            if units_val is not None:
-                # 단위 번호를 단위 이름으로 변환
-                units_map = {
-                    95: "degrees-celsius",
-                    96: "degrees-fahrenheit", 
-                    98: "degrees-kelvin",
-                    5: "amperes",
-                    4: "volts",
-                    74: "kilowatts",
-                    19: "cubic-feet-per-minute",
-                    159: "no-units",
-                    62: "percent",
-                    # 더 많은 단위들...
-                }
-                return units_map.get(int(units_val), f"unit-{int(units_val)}")
-        except:
-            pass
-        
-        # 원시 데이터 접근 시도
-        try:
-            if hasattr(bacnet_value, 'tagList') and bacnet_value.tagList:
-                tag = bacnet_value.tagList[0]
-                if hasattr(tag, 'tagData'):
-                    # 바이트 데이터를 적절히 변환
-                    if len(tag.tagData) == 1:
-                        return int.from_bytes(tag.tagData, 'big')
-                    elif len(tag.tagData) == 2:
-                        return int.from_bytes(tag.tagData, 'big')
-                    elif len(tag.tagData) == 4:
-                        # 4바이트는 float일 수도 있음
-                        import struct
-                        try:
-                            return struct.unpack('>f', tag.tagData)[0]
-                        except:
-                            return int.from_bytes(tag.tagData, 'big')
-        except:
-            pass
-        
-        # 직접 문자열 변환
-        return str(bacnet_value)
+        # 가장 일반적인 방법 (속성 조회 한 번)
+        value = getattr(bacnet_value, 'value', _MISSING)
+        if value is not _MISSING:
+            return value
+        
+        # 태그 번호로 타입을 결정하고 한 번만 변환
+        tag = application_tag(bacnet_value)
+        if tag is not None:
+            if tag.tag_number == TagNumber.null:
+                return None
+            if tag.tag_number in _EXTRACTORS:
+                bacnet_type, python_type = _EXTRACTORS[tag.tag_number]
+                return python_type(bacnet_value.cast_out(bacnet_type))
+        
+        # 알 수 없는 태그는 타입별 캐스팅으로 처리
+        return _extract_by_casting(bacnet_value)
         
     except Exception as e:
-        print(f"값 추출 오류: {e}")
+        _log.warning("값 추출 오류: %s", e)
         return str(bacnet_value)
 
+# 원시 태그 데이터 길이별 언패커 (4바이트는 float, 8바이트는 double로 해석)
+_RAW_UNPACKERS = {
+    1: struct.Struct('>B').unpack,
+    2: struct.Struct('>H').unpack,
+    4: struct.Struct('>f').unpack,
+    8: struct.Struct('>d').unpack,
+}
+
+# 캐스팅 실패 시 발생하는 예외 (태그 불일치, 디코딩 오류 등)
+_CAST_ERRORS = (RejectException, TypeError, ValueError, AttributeError)
+
+def _extract_by_casting(bacnet_value):
+    """타입별 캐스팅을 차례로 시도해 값 추출 (태그로 판별되지 않는 경우)"""
+    # 실수형 시도
+    try:
+        real_val = bacnet_value.cast_out(Real)
+        if real_val is not None:
+            return float(real_val)
+    except _CAST_ERRORS:
+        pass
+
+    # 정수형 시도
+    try:
+        uint_val = bacnet_value.cast_out(Unsigned)
+        if uint_val is not None:
+            return int(uint_val)
+    except _CAST_ERRORS:
+        pass
+
+    # 문자열 시도
+    try:
+        str_val = bacnet_value.cast_out(CharacterString)
+        if str_val is not None:
+            return str(str_val)
+    except _CAST_ERRORS:
+        pass
+
+    # 불린형 시도
+    try:
+        bool_val = bacnet_value.cast_out(Boolean)
+        if bool_val is not None:
+            return bool(bool_val)
+    except _CAST_ERRORS:
+        pass
+
+    # 열거형 시도 (units 등)
+    try:
+        enum_val = bacnet_value.cast_out(Enumerated)
+        if enum_val is not None:
+            return int(enum_val)
+    except _CAST_ERRORS:
+        pass
+
+    # EngineeringUnits 시도
+    try:
+        units_val = bacnet_value.cast_out(EngineeringUnits)
+        if units_val is not None:
+            # 단위 번호를 단위 이름으로 변환
+            return _units_name(int(units_val))
+    except _CAST_ERRORS:
+        pass
+
+    # 원시 데이터 접근 시도
+    try:
+        tag_list = getattr(bacnet_value, 'tagList', None)
+        if tag_list:
+            tag = tag_list[0]
+            if hasattr(tag, 'tagData'):
+                # 바이트 길이에 맞는 언패커로 변환
+                unpack = _RAW_UNPACKERS.get(len(tag.tagData))
+                if unpack is not None:
+                    return unpack(tag.tagData)[0]
+    except _CAST_ERRORS:
+        pass
+    
+    # 직접 문자열 변환
+    return str(bacnet_value)
+
 def debug_any_object(any_obj, name="Unknown"):
-    """Any 객체의 구조를 디버깅"""
+    """Any 객체의 구조를 디버깅 (_debug가 켜져 있을 때만)"""
+    if not _debug:
+        return
+    
     print(f"\n=== Debug {name} ===")
     print(f"Type: {type(any_obj)}")
-    print(f"Dir: {[attr for attr in dir(any_obj) if not attr.startswith('_')]}")
+    print(f"Dir: {', '.join(attr for attr in dir(any_obj) if not attr.startswith('_'))}")
     
     # 중요한 속성들 확인
     important_attrs = ['value', 'tagList', 'cast_out', 'encode', 'decode']
@@ -133,9 +179,10 @@ def debug_any_object(any_obj, name="Unknown"):
                 print(f"{attr}: Error - {e}")
     
     # tagList가 있다면 상세 확인
-    if hasattr(any_obj, 'tagList') and any_obj.tagList:
+    tag_list = getattr(any_obj, 'tagList', None)
+    if tag_list:
         print("TagList details:")
-        for i, tag in enumerate(any_obj.tagList):
+        for i, tag in enumerate(tag_list):
             print(f"  Tag {i}: {tag}")
             if hasattr(tag, 'tagData'):
                 print(f"    tagData: {tag.tagData} (hex: {tag.tagData.hex() if tag.tagData else 'None'})")
@@ -146,118 +193,124 @@ def debug_any_object(any_obj, name="Unknown"):
     
     print("=================\n")
 
-async def read_property(app, device_address, object_id, property_id):
-    """BACnet 디바이스에서 속성 읽기"""
+# 요청 전 기본 간격 (초, 느린 장치용으로만 설정)
+PACING = 0.0
+
+# 무응답/거부 시 장치별 백오프 (초)
+BACKOFF_INITIAL = 0.1
+BACKOFF_MAX = 2.0
+_BACKOFF_ERRORS = (asyncio.TimeoutError, AbortPDU, RejectPDU)
+_backoff = {}
+
+async def _pace(device_address):
+    """요청 전 대기 (기본 간격 + 장치별 백오프, 둘 다 없으면 바로 반환)"""
+    delay = PACING + _backoff.get(device_address, 0.0)
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+def _update_backoff(device_address, error=None):
+    """요청 결과로 백오프 갱신 (응답을 받으면 초기화, 무응답/거부면 두 배로)"""
+    if error is None:
+        _backoff.pop(device_address, None)
+    elif isinstance(error, _BACKOFF_ERRORS):
+        delay = _backoff.get(device_address, BACKOFF_INITIAL / 2) * 2
+        _backoff[device_address] = min(delay, BACKOFF_MAX)
+
+# 세션 중 바뀌지 않는 속성: (장치 주소, 객체, 속성) -> 읽은 값
+_IMMUTABLE_PROPS = frozenset({"objectName", "description", "units", "objectIdentifier", "objectType"})
+_READ_CACHE = {}
+
+def clear_read_cache(device_address=None):
+    """읽기 캐시 비우기 (장치를 지정하면 해당 장치만, 재시작 시 등)"""
+    if device_address is None:
+        _READ_CACHE.clear()
+    else:
+        for key in [key for key in _READ_CACHE if key[0] == device_address]:
+            del _READ_CACHE[key]
+
+async def read_property(app, device_address, object_id, property_id, cacheable=None):
+    """BACnet 디바이스에서 속성 읽기 (cacheable이 None이면 고정 속성만 캐시)"""
+    if cacheable is None:
+        cacheable = property_id in _IMMUTABLE_PROPS
+    key = (device_address, object_id, property_id)
+    if cacheable and key in _READ_CACHE:
+        return _READ_CACHE[key]
+    
     try:
-        # ReadPropertyRequest 생성
-        request = ReadPropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
-            propertyIdentifier=property_id
-        )
-        request.pduDestination = Address(device_address)
+        # ReadPropertyRequest 생성 (캐시된 템플릿 복사)
+        request = make_read_request(device_address, object_id, property_id)
         
         # 요청 전송 및 응답 대기
-        response = await app.request(request)
+        await _pace(device_address)
+        async with get_device_semaphore(device_address):  # 장치별 동시 요청 수 제한
+            response = await app.request(request)
+        _update_backoff(device_address)
         
         if response:
             # Any 객체에서 실제 값 추출
-            property_value = response.propertyValue
-            return extract_value(property_value)
+            value = extract_value(response.propertyValue)
+            if cacheable and value is not None:
+                _READ_CACHE[key] = value
+            return value
         else:
-            print("응답이 없습니다.")
+            _log.warning("응답이 없습니다.")
             return None
             
+    except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+        _update_backoff(device_address, e)
+        _log.warning("읽기 오류: %s", e)
+        return None
     except Exception as e:
-        print(f"읽기 오류: {e}")
+        _log.warning("읽기 오류: %s", e)
         return None
 
-async def write_property(app, device_address, object_id, property_id, value, priority=None):
-    """BACnet 디바이스에 속성 쓰기"""
+async def _do_write(app, device_address, object_id, property_id, value, priority=None):
+    """WritePropertyRequest 구성 및 전송 (write_property, write_present_value 공용)"""
     try:
-        from bacpypes3.primitivedata import Real, Unsigned, CharacterString, Boolean, Enumerated
-        from bacpypes3.constructeddata import Any
-        
-        # 값의 타입에 따라 적절한 BACnet 데이터 타입으로 변환
-        if isinstance(value, float):
-            bacnet_value = Any(Real(value))
-        elif isinstance(value, int):
-            bacnet_value = Any(Unsigned(value))
-        elif isinstance(value, str):
-            bacnet_value = Any(CharacterString(value))
-        elif isinstance(value, bool):
-            bacnet_value = Any(Boolean(value))
-        else:
-            # 기본값으로 문자열 처리
-            bacnet_value = Any(CharacterString(str(value)))
-        
         # WritePropertyRequest 생성
         request = WritePropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
+            objectIdentifier=get_object_identifier(object_id),
             propertyIdentifier=property_id,
-            propertyValue=bacnet_value
+            propertyValue=encode_value(value)  # 값 타입에 맞는 BACnet 타입으로 변환
         )
         
         # 우선순위 설정 (있는 경우) - priority 필드 사용
         if priority is not None:
             request.priority = priority
         
-        request.pduDestination = Address(device_address)
+        request.pduDestination = get_address(device_address)
+        
+        # 캐시된 값은 쓰기 후 더 이상 유효하지 않음
+        _READ_CACHE.pop((device_address, object_id, property_id), None)
         
         # 요청 전송 및 응답 대기
-        response = await app.request(request)
+        await _pace(device_address)
+        async with get_device_semaphore(device_address):  # 장치별 동시 요청 수 제한
+            response = await app.request(request)
+        _update_backoff(device_address)
         
         if response:
-            print(f"쓰기 성공: {object_id}.{property_id} = {value}")
+            _log.debug("쓰기 성공: %s.%s = %s (priority: %s)", object_id, property_id, value, priority)
             return True
         else:
-            print("쓰기 응답이 없습니다.")
+            _log.warning("쓰기 응답이 없습니다.")
             return False
             
+    except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+        _update_backoff(device_address, e)
+        _log.warning("쓰기 오류: %s", e)
+        return False
     except Exception as e:
-        print(f"쓰기 오류: {e}")
+        _log.warning("쓰기 오류: %s", e)
         return False
 
+async def write_property(app, device_address, object_id, property_id, value, priority=None):
+    """BACnet 디바이스에 속성 쓰기"""
+    return await _do_write(app, device_address, object_id, property_id, value, priority)
+
 async def write_present_value(app, device_address, object_id, value, priority=16):
     """Present Value 전용 쓰기 함수 (우선순위 포함)"""
-    try:
-        from bacpypes3.primitivedata import Real, Unsigned, CharacterString, Boolean
-        from bacpypes3.constructeddata import Any
-        
-        # 값 타입 자동 결정
-        if isinstance(value, float):
-            bacnet_value = Any(Real(value))
-        elif isinstance(value, int):
-            bacnet_value = Any(Unsigned(value))
-        elif isinstance(value, bool):
-            bacnet_value = Any(Boolean(value))
-        else:
-            bacnet_value = Any(CharacterString(str(value)))
-        
-        # WritePropertyRequest with priority
-        request = WritePropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
-            propertyIdentifier="presentValue",
-            propertyValue=bacnet_value
-        )
-        
-        # 우선순위 설정
-        if priority is not None:
-            request.priority = priority
-            
-        request.pduDestination = Address(device_address)
-        
-        response = await app.request(request)
-        
-        if response:
-            print(f"Present Value 쓰기 성공: {object_id} = {value} (priority: {priority})")
-            return True
-        else:
-            print("Present Value 쓰기 실패")
-            return False
-            
-    except Exception as e:
-        print(f"Present Value 쓰기 오류: {e}")
-        return False
+    return await _do_write(app, device_address, object_id, "presentValue", value, priority)
 
 async def safe_write_test(app, device_address):
     """안전한 쓰기 테스트 - 여러 객체 타입 시도"""
@@ -303,7 +356,6 @@ async def safe_write_test(app, device_address):
                 success = await write_present_value(app, device_address, obj_id, test_val)
                 if success:
                     # 확인
-                    await asyncio.sleep(0.5)
                     new_val = await read_property(app, device_address, obj_id, "presentValue")
                     print(f"  쓰기 성공: {test_val} → 읽은 값: {new_val}")
                     return obj_id, test_val  # 성공한 객체 반환
@@ -321,18 +373,8 @@ async def safe_write_test(app, device_address):
 async def main():
     """메인 함수"""
     try:
-        # 디바이스 객체 생성
-        device = DeviceObject(
-            objectName="BACpypes3 Reader",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        # NormalApplication 사용 (올바른 애플리케이션 클래스)
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
+        # 공유 애플리케이션 사용 (처음 호출 시 생성)
+        app = await get_app("BACpypes3 Reader")
         
         print("=== BACpypes3 읽기 예제 ===")
         print("애플리케이션 시작됨")
@@ -364,25 +406,21 @@ async def main():
         print("\n--- 여러 속성 읽기 ---")
         properties = ["presentValue", "objectName", "description", "units"]
         
-        for prop in properties:
-            print(f"읽는 중: {prop}")
-            value = await read_property(app, device_address, object_id, prop)
+        # 네 속성을 ReadPropertyMultiple 한 번으로 읽기 (지원하지 않는 장치는 속성별로 읽음)
+        print(f"읽는 중: {', '.join(properties)}")
+        values = await _read_object_properties(app, device_address, object_id, properties)
+        
+        for prop, value in zip(properties, values):
             print(f"{prop}: {value}")
             
             # units 속성인 경우 상세 디버깅
-            if prop == "units" and isinstance(value, str) and "Any object" in value:
+            if _debug and prop == "units" and isinstance(value, str) and "Any object" in value:
                 # 원본 응답 다시 가져와서 디버깅
-                debug_request = ReadPropertyRequest(
-                    objectIdentifier=ObjectIdentifier(object_id),
-                    propertyIdentifier=prop
-                )
-                debug_request.pduDestination = Address(device_address)
+                debug_request = make_read_request(device_address, object_id, prop)
                 debug_response = await app.request(debug_request)
                 if debug_response:
                     debug_any_object(debug_response.propertyValue, f"{prop} value")
             
-            await asyncio.sleep(0.5)  # 요청 간격
-            
     except KeyboardInterrupt:
         print("\n프로그램 중단됨")
     except Exception as e:
@@ -394,18 +432,8 @@ async def main():
 async def simple_read():
     """간단한 읽기 예제"""
     try:
-        # 기본 설정으로 디바이스 생성
-        device = DeviceObject(
-            objectName="Simple Reader",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        # NormalApplication 사용
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
+        # 공유 애플리케이션 사용 (처음 호출 시 생성)
+        app = await get_app("Simple Reader")
         
         print("간단한 읽기 시작...")
         print(f"로컬: 200.0.0.234 → 타겟: 200.0.0.162")
@@ -418,11 +446,7 @@ async def simple_read():
         print(f"Present Value: {value}")
         
         # 디버깅: 원본 객체 타입도 확인
-        debug_request = ReadPropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
-            propertyIdentifier="presentValue"
-        )
-        debug_request.pduDestination = Address(target_device)
+        debug_request = make_read_request(target_device, object_id, "presentValue")
         
         raw_response = await app.request(debug_request)
         if raw_response:
@@ -450,10 +474,8 @@ async def simple_read():
             for val in values_to_test:
                 success = await write_present_value(app, target_device, writable_obj, val)
                 if success:
-                    await asyncio.sleep(0.5)
                     read_val = await read_property(app, target_device, writable_obj, "presentValue")
                     print(f"  {val} → {read_val}")
-                await asyncio.sleep(1)
         else:
             print("쓰기 가능한 객체를 찾을 수 없습니다.")
             print("가능한 원인:")
@@ -466,20 +488,59 @@ async def simple_read():
         import traceback
         traceback.print_exc()
 
+# 배치 요청 동시 처리 개수 기본값 (장치별로 조정 가능)
+BATCH_CONCURRENCY = 8
+
+async def _bounded(semaphore, coro):
+    """세마포어로 동시 요청 수를 제한하며 코루틴 실행"""
+    async with semaphore:
+        return await coro
+
+# ReadPropertyMultiple/WritePropertyMultiple 한 요청에 담을 최대 속성 수
+# (maxApduLengthAccepted=1024를 넘지 않도록)
+MULTIPLE_MAX_PROPERTIES = 20
+
+def _chunks(items, size):
+    """목록을 size개씩 나누기"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+async def _write_chunk(app, device_address, writes):
+    """WritePropertyMultiple로 쓰고, 실패하면 속성별로 쓰기 (키별 성공 여부 목록 반환)"""
+    for object_id, property_id, _ in writes:
+        _READ_CACHE.pop((device_address, object_id, property_id), None)
+    
+    async with get_device_semaphore(device_address):
+        if await write_property_multiple(app, device_address, writes):
+            return [True] * len(writes)
+    
+    return await asyncio.gather(*(
+        write_property(app, device_address, object_id, property_id, value)
+        for object_id, property_id, value in writes
+    ))
+
 # 배치 쓰기 함수
-async def batch_write(app, device_address, write_list):
-    """여러 속성을 순차적으로 쓰기"""
-    results = {}
+async def batch_write(app, device_address, write_list, concurrency=BATCH_CONCURRENCY):
+    """여러 속성을 WritePropertyMultiple로 묶어 쓰기 (최대 concurrency개 요청)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    write_list = list(write_list)
     
     for object_id, property_id, value in write_list:
-        key = f"{object_id[0]}:{object_id[1]}.{property_id}"
-        try:
-            print(f"쓰는 중: {key} = {value}")
-            success = await write_property(app, device_address, object_id, property_id, value)
-            results[key] = "성공" if success else "실패"
-            await asyncio.sleep(0.5)  # 요청 간격
-        except Exception as e:
-            results[key] = f"오류: {e}"
+        _log.debug("쓰는 중: %s:%s.%s = %s", object_id[0], object_id[1], property_id, value)
+    
+    chunks = _chunks(write_list, MULTIPLE_MAX_PROPERTIES)
+    outcomes = await asyncio.gather(
+        *(_bounded(semaphore, _write_chunk(app, device_address, chunk)) for chunk in chunks),
+        return_exceptions=True
+    )
+    
+    results = {}
+    for chunk, outcome in zip(chunks, outcomes):
+        for index, (object_id, property_id, _) in enumerate(chunk):
+            key = f"{object_id[0]}:{object_id[1]}.{property_id}"
+            if isinstance(outcome, Exception):
+                results[key] = f"오류: {outcome}"
+            else:
+                results[key] = "성공" if outcome[index] else "실패"
     
     return results
 
@@ -487,16 +548,8 @@ async def batch_write(app, device_address, write_list):
 async def write_example():
     """쓰기 전용 예제"""
     try:
-        device = DeviceObject(
-            objectName="BACnet Writer",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
+        # 공유 애플리케이션 사용 (처음 호출 시 생성)
+        app = await get_app("BACnet Writer")
         
         print("=== BACnet 쓰기 예제 ===")
         print(f"로컬: 200.0.0.234 → 타겟: 200.0.0.162")
@@ -512,10 +565,8 @@ async def write_example():
             print(f"값 {val} 쓰기 중...")
             success = await write_present_value(app, target_device, object_id, val, priority=16)
             if success:
-                await asyncio.sleep(1)
                 read_val = await read_property(app, target_device, object_id, "presentValue")
                 print(f"확인: {read_val}")
-            await asyncio.sleep(2)
         
         # 2. 배치 쓰기
         print("\n2. 배치 쓰기")
@@ -547,36 +598,59 @@ async def write_example():
         print(f"쓰기 예제 오류: {e}")
         import traceback
         traceback.print_exc()
-async def batch_read_sequential(app, device_address, read_list):
-    """여러 속성을 순차적으로 읽기"""
-    results = {}
+
+async def _read_object_properties(app, device_address, object_id, property_ids):
+    """한 객체의 여러 속성을 ReadPropertyMultiple로 읽기 (실패하면 속성별로 읽기)"""
+    async with get_device_semaphore(device_address):
+        values = await read_property_multiple(
+            app, device_address, object_id, [(property_id, None) for property_id in property_ids]
+        )
     
+    if values is None:
+        return await asyncio.gather(*(
+            read_property(app, device_address, object_id, property_id)
+            for property_id in property_ids
+        ))
+    return [extract_value(values[(property_id, None)]) for property_id in property_ids]
+
+async def batch_read_sequential(app, device_address, read_list, concurrency=BATCH_CONCURRENCY):
+    """여러 속성을 객체별 ReadPropertyMultiple로 묶어 읽기 (최대 concurrency개 요청)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    # 객체별로 속성 묶기 (한 요청의 속성 수 제한)
+    groups = {}
     for object_id, property_id in read_list:
-        key = f"{object_id[0]}:{object_id[1]}.{property_id}"
-        try:
-            print(f"읽는 중: {key}")
-            value = await read_property(app, device_address, object_id, property_id)
-            results[key] = value
-            await asyncio.sleep(0.1)  # 요청 간격
-        except Exception as e:
-            results[key] = f"오류: {e}"
+        _log.debug("읽는 중: %s:%s.%s", object_id[0], object_id[1], property_id)
+        groups.setdefault(object_id, []).append(property_id)
+    requests = [
+        (object_id, chunk)
+        for object_id, property_ids in groups.items()
+        for chunk in _chunks(property_ids, MULTIPLE_MAX_PROPERTIES)
+    ]
     
-    return results
+    outcomes = await asyncio.gather(
+        *(_bounded(semaphore, _read_object_properties(app, device_address, object_id, chunk))
+          for object_id, chunk in requests),
+        return_exceptions=True
+    )
+    
+    values = {}
+    for (object_id, chunk), outcome in zip(requests, outcomes):
+        for index, property_id in enumerate(chunk):
+            values[object_id, property_id] = f"오류: {outcome}" if isinstance(outcome, Exception) else outcome[index]
+    
+    # 요청 목록 순서대로 결과 구성
+    return {
+        f"{object_id[0]}:{object_id[1]}.{property_id}": values[object_id, property_id]
+        for object_id, property_id in read_list
+    }
 
 # 배치 읽기 예제
 async def batch_example():
     """배치 읽기 예제"""
     try:
-        device = DeviceObject(
-            objectName="Batch Reader",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
+        # 공유 애플리케이션 사용 (처음 호출 시 생성)
+        app = await get_app("Batch Reader")
         
         # 읽을 목록 정의
         read_list = [
@@ -602,34 +676,35 @@ async def batch_example():
 # Who-Is 요청 예제 (네트워크의 디바이스 찾기)
 async def discover_devices():
     """네트워크에서 BACnet 디바이스 찾기"""
+    devices = {}
     try:
-        from bacpypes3.apdu import WhoIsRequest
-        
-        device = DeviceObject(
-            objectName="Device Discoverer",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
+        # 공유 애플리케이션 사용 (처음 호출 시 생성)
+        app = await get_app("Device Discoverer")
         
         print("=== 디바이스 검색 ===")
         print(f"로컬 주소: 200.0.0.234에서 검색 중...")
-        
-        # Who-Is 요청 (브로드캐스트)
-        request = WhoIsRequest()
-        request.pduDestination = Address()  # 브로드캐스트
-        
         print("Who-Is 요청 전송 중...")
         
-        # 주의: Who-Is는 응답을 기다리지 않고 I-Am 메시지를 받아야 함
-        # 실제 구현에서는 I-Am 핸들러가 필요함
+        # I-Am 응답은 도착하는 대로 처리, 응답이 끊기면 종료
+        async for i_am in discover_i_am(app):
+            device_address = str(i_am.pduSource)
+            devices[device_address] = i_am.iAmDeviceIdentifier
+            clear_read_cache(device_address)  # 재시작했을 수 있으므로 캐시 무효화
+            print(f"  발견: {i_am.iAmDeviceIdentifier} @ {device_address} (vendor: {i_am.vendorID})")
+        
+        print(f"검색 완료: {len(devices)}개 디바이스")
         
     except Exception as e:
         print(f"디바이스 검색 오류: {e}")
+    
+    return devices
+
+async def run_example(example):
+    """예제 코루틴 실행 후 공유 애플리케이션 닫기"""
+    try:
+        await example()
+    finally:
+        close_app()
 
 if __name__ == "__main__":
     print("BACpypes3 수정된 버전")
@@ -637,11 +712,11 @@ if __name__ == "__main__":
     print()
     
     print("실행 옵션:")
-    print("1. asyncio.run(main())              # 전체 예제 (읽기+쓰기)")
-    print("2. asyncio.run(simple_read())       # 간단한 읽기") 
-    print("3. asyncio.run(batch_example())     # 배치 읽기")
-    print("4. asyncio.run(write_example())     # 쓰기 전용 예제")
-    print("5. asyncio.run(discover_devices())  # 디바이스 검색")
+    print("1. asyncio.run(run_example(main))                # 전체 예제 (읽기+쓰기)")
+    print("2. asyncio.run(run_example(simple_read))         # 간단한 읽기") 
+    print("3. asyncio.run(run_example(batch_example))       # 배치 읽기")
+    print("4. asyncio.run(run_example(write_example))       # 쓰기 전용 예제")
+    print("5. asyncio.run(run_example(discover_devices))    # 디바이스 검색")
     print()
     print("주의사항:")
     print("- 로컬 주소: 200.0.0.234/24")
@@ -649,6 +724,8 @@ if __name__ == "__main__":
     print("- 디바이스 ID: 162 (필요시 수정)")
     print("- 방화벽에서 UDP 47808 포트를 허용하세요")
     print("- 네트워크 연결 상태를 확인하세요")
+    print("- (선택) pip install uvloop 으로 더 빠른 이벤트 루프 사용")
     
-    # 기본 실행
-    asyncio.run(main())
\ No newline at end of file
+    # 기본 실행 (uvloop이 있으면 사용)
+    install_uvloop()
+    asyncio.run(run_example(main))
\ No newline at end of file
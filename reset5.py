@@ -1,28 +1,24 @@
 #!/usr/bin/env python3
 
 import asyncio
-from bacpypes3.local.device import DeviceObject
-from bacpypes3.pdu import Address, IPv4Address
-from bacpypes3.primitivedata import ObjectIdentifier, TagList, Tag, TagClass, TagNumber
-from bacpypes3.apdu import WritePropertyRequest
-from bacpypes3.ipv4.app import NormalApplication
+import traceback
+from bacpypes3.primitivedata import Null
+from bacpypes3.apdu import (
+    WritePropertyRequest, WritePropertyMultipleRequest, ErrorRejectAbortNack
+)
+from bacpypes3.basetypes import PropertyValue, WriteAccessSpecification
+from bacpypes3.constructeddata import Any
+from bacnet_utils import get_app, close_app, install_uvloop, get_object_identifier, get_address
 
-async def write_null_to_priority(target_device, object_id, priority=1):
-    """우선순위에 NULL 값 쓰기 - 수동 태그 생성"""
+# 디버깅 비활성화
+_debug = 0
+
+# 우선순위 해제용 NULL 값 (애플리케이션 태그 NULL, 길이 0) - 모든 쓰기에서 재사용
+NULL_VALUE = Any(Null(()))
+
+async def write_null_to_priority(app, target_device, object_id, priority=1):
+    """presentValue의 우선순위에 NULL 값 쓰기"""
     try:
-        # BACnet 디바이스 설정
-        device = DeviceObject(
-            objectName="BACnet NULL Writer",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        # 애플리케이션 생성
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
-        
         print("=" * 50)
         print("BACnet NULL 쓰기")
         print("=" * 50)
@@ -31,28 +27,16 @@ async def write_null_to_priority(target_device, object_id, priority=1):
         print(f"우선순위: {priority}")
         print()
         
-        # NULL 태그 수동 생성
-        # BACnet NULL은 태그 번호 0, 길이 0
-        null_tag = Tag(
-            tag_class=TagClass.application,
-            tag_number=TagNumber(0),  # NULL의 태그 번호
-            tag_data=b''  # 빈 데이터
-        )
-        
-        # TagList에 NULL 태그 추가
-        tag_list = TagList()
-        tag_list.append(null_tag)
-        
         # 쓰기 요청 생성
         request = WritePropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
+            objectIdentifier=get_object_identifier(object_id),
             propertyIdentifier="presentValue",
-            propertyValue=tag_list  # TagList 직접 사용
+            propertyValue=NULL_VALUE
         )
         
         # 우선순위 설정
         request.priority = priority
-        request.pduDestination = Address(target_device)
+        request.pduDestination = get_address(target_device)
         
         print(f"우선순위 {priority}에 NULL 전송 중...")
         
@@ -66,28 +50,15 @@ async def write_null_to_priority(target_device, object_id, priority=1):
             print("❌ 전송 실패: 응답 없음")
             return False
             
-    except Exception as e:
+    except (Exception, ErrorRejectAbortNack) as e:
         print(f"❌ 오류: {e}")
-        import traceback
-        traceback.print_exc()
+        if _debug:
+            traceback.print_exc()
         return False
 
-async def write_null_simple(target_device, object_id, priority=1):
+async def write_null_simple(app, target_device, object_id, priority=1):
     """더 간단한 NULL 쓰기 시도"""
     try:
-        # BACnet 디바이스 설정
-        device = DeviceObject(
-            objectName="BACnet NULL Writer",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        # 애플리케이션 생성
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
-        
         print("=" * 50)
         print("BACnet NULL 쓰기 (간단한 방법)")
         print("=" * 50)
@@ -98,23 +69,13 @@ async def write_null_simple(target_device, object_id, priority=1):
         
         # priorityArray에 직접 쓰기
         request = WritePropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
+            objectIdentifier=get_object_identifier(object_id),
             propertyIdentifier="priorityArray",
             propertyArrayIndex=priority
         )
         
-        # NULL 태그 생성
-        null_tag = Tag(
-            tag_class=TagClass.application,
-            tag_number=TagNumber(0),
-            tag_data=b''
-        )
-        
-        tag_list = TagList()
-        tag_list.append(null_tag)
-        
-        request.propertyValue = tag_list
-        request.pduDestination = Address(target_device)
+        request.propertyValue = NULL_VALUE
+        request.pduDestination = get_address(target_device)
         
         print(f"priorityArray[{priority}]에 NULL 전송 중...")
         
@@ -128,25 +89,98 @@ async def write_null_simple(target_device, object_id, priority=1):
             print("❌ 전송 실패: 응답 없음")
             return False
             
-    except Exception as e:
+    except (Exception, ErrorRejectAbortNack) as e:
         print(f"❌ 오류: {e}")
-        import traceback
-        traceback.print_exc()
+        if _debug:
+            traceback.print_exc()
         return False
 
+# NULL 쓰기 방법 ("pv": presentValue에 우선순위로, "pa": priorityArray[우선순위]에 직접)
+_NULL_WRITE_METHODS = {
+    "pv": ("presentValue에 NULL 쓰기", write_null_to_priority),
+    "pa": ("priorityArray에 직접 NULL 쓰기", write_null_simple),
+}
+
+# 디바이스별로 마지막에 성공한 방법 (auto 모드에서 먼저 시도)
+_preferred_strategy = {}
+
+async def write_null(app, target_device, object_id, priority=1, strategy="auto"):
+    """우선순위 NULL 쓰기 (strategy: "auto" | "pv" | "pa")"""
+    if strategy == "auto":
+        first = _preferred_strategy.get(target_device, "pv")
+        order = [first] + [name for name in _NULL_WRITE_METHODS if name != first]
+    else:
+        order = [strategy]
+    
+    for i, name in enumerate(order, 1):
+        label, method = _NULL_WRITE_METHODS[name]
+        if i > 1:
+            print()
+        print(f"방법 {i}: {label}")
+        if await method(app, target_device, object_id, priority):
+            _preferred_strategy[target_device] = name
+            return True
+    return False
+
+def _null_property_value(strategy, priority):
+    """한 우선순위를 해제하는 PropertyValue (strategy는 "pv" 또는 "pa")"""
+    if strategy == "pa":
+        return PropertyValue(propertyIdentifier="priorityArray", propertyArrayIndex=priority, value=NULL_VALUE)
+    return PropertyValue(propertyIdentifier="presentValue", value=NULL_VALUE, priority=priority)
+
+# WritePropertyMultiple을 지원하지 않는다는 뜻의 Reject/Abort/Error 사유 (이때만 우선순위별로 다시 보냄)
+_WPM_UNSUPPORTED_REASONS = {"unrecognized-service", "segmentation-not-supported", "service-request-denied"}
+
+def _wpm_unsupported(err):
+    """WritePropertyMultiple 미지원 응답이면 True (응답 없음 등 다른 실패는 False)"""
+    return isinstance(err, ErrorRejectAbortNack) and str(err.reason) in _WPM_UNSUPPORTED_REASONS
+
+async def write_null_priorities(app, target_device, object_id, priorities, strategy="auto"):
+    """여러 우선순위를 WritePropertyMultiple 한 번으로 해제 (지원하지 않으면 우선순위별로 write_null)"""
+    multiple_strategy = _preferred_strategy.get(target_device, "pv") if strategy == "auto" else strategy
+    try:
+        print(f"우선순위 {list(priorities)}에 NULL 일괄 전송 중...")
+        request = WritePropertyMultipleRequest(
+            listOfWriteAccessSpecs=[
+                WriteAccessSpecification(
+                    objectIdentifier=get_object_identifier(object_id),
+                    listOfProperties=[_null_property_value(multiple_strategy, p) for p in priorities]
+                )
+            ]
+        )
+        request.pduDestination = get_address(target_device)
+        
+        await app.request(request)
+        print("✅ NULL 일괄 전송 성공!")
+        return True
+    except (Exception, ErrorRejectAbortNack) as e:
+        if _debug:
+            traceback.print_exc()
+        if not _wpm_unsupported(e):
+            print(f"❌ 일괄 전송 실패: {e}")
+            return False
+        print(f"일괄 전송 미지원 ({e}), 우선순위별로 전송")
+    
+    # 순서대로 보내야 처음 성공한 방법이 다음 우선순위부터 먼저 사용됨
+    results = []
+    for p in priorities:
+        results.append(await write_null(app, target_device, object_id, p, strategy))
+    return all(results)
+
 async def main():
     """메인 함수"""
     # 설정값
     target_device = "200.0.0.162"
     object_id = ("analogOutput", 1)
-    priority = 2
-    
-    print("방법 1: presentValue에 NULL 쓰기")
-    success = await write_null_to_priority(target_device, object_id, priority)
+    priorities = [2, 8]
     
-    if not success:
-        print("\n방법 2: priorityArray에 직접 NULL 쓰기")
-        success = await write_null_simple(target_device, object_id, priority)
+    # 두 방법이 같은 애플리케이션(소켓)을 사용
+    app = await get_app("BACnet NULL Writer")
+    try:
+        # 장치가 받아들이는 방법을 알면 strategy로 지정해 실패하는 왕복을 생략
+        success = await write_null_priorities(app, target_device, object_id, priorities)
+    finally:
+        close_app()
     
     if success:
         print("\n🎉 우선순위 NULL 설정 완료!")
@@ -155,4 +189,6 @@ async def main():
         print("\n대안: 우선순위 16을 시도하거나 장치 웹 인터페이스를 사용하세요.")
 
 if __name__ == "__main__":
+    # uvloop이 있으면 사용
+    install_uvloop()
     asyncio.run(main())
\ No newline at end of file
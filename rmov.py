@@ -1,71 +1,92 @@
 #!/usr/bin/env python3
 
 import asyncio
-from bacpypes3.local.device import DeviceObject
-from bacpypes3.pdu import Address, IPv4Address
-from bacpypes3.primitivedata import ObjectIdentifier, Real
-from bacpypes3.apdu import WritePropertyRequest, ReadPropertyRequest
-from bacpypes3.ipv4.app import NormalApplication
+import os
+import sys
+from bacpypes3.primitivedata import Null
+from bacpypes3.apdu import WritePropertyRequest, ReadPropertyRequest, ErrorRejectAbortNack
+from bacpypes3.constructeddata import Any
+from bacnet_utils import (
+    get_app, close_app, extract_value, is_null_value, get_object_identifier, get_address,
+    get_device_semaphore, configure_concurrency, request_with_retries
+)
 
-# Null 타입 정의
-class NullValue:
-    """BACnet NULL 값을 나타내는 클래스"""
-    def __init__(self):
-        pass
-    
-    def encode(self):
-        # NULL 태그 (0x00)
-        return b'\x00'
+# 우선순위 해제용 NULL 값 (애플리케이션 태그 NULL, 길이 0)
+NULL_VALUE = Any(Null(()))
+
+class _Null:
+    """비어 있는(NULL) 우선순위 슬롯 표시 (출력하면 NULL)"""
+    __slots__ = ()
     
-    def __str__(self):
+    def __repr__(self):
         return "NULL"
 
+# read_priority_array가 NULL 슬롯에 대해 반환하는 값 (is로 비교)
+NULL = _Null()
+
+# ainput이 읽었지만 아직 돌려주지 않은 입력 (여러 줄이 한 번에 들어온 경우)
+_stdin_buffer = bytearray()
+
+async def ainput(prompt):
+    """이벤트 루프를 멈추지 않는 input (재전송 타이머, COV 알림이 계속 처리됨)
+    
+    표준 입력을 이벤트 루프에서 직접 기다리므로 입력 대기 중인 스레드가 없어
+    Ctrl-C로 바로 종료된다. 기다릴 수 없는 입력(파일, /dev/null 리다이렉트)이나
+    add_reader를 지원하지 않는 루프(Windows)는 기본 실행기에서 input()으로 읽는다.
+    """
+    loop = asyncio.get_running_loop()
+    print(prompt, end="", flush=True)
+    fd = sys.stdin.fileno()
+    
+    while b"\n" not in _stdin_buffer:
+        readable = loop.create_future()
+        try:
+            loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        except (NotImplementedError, OSError):
+            # 일반 파일은 epoll에 등록할 수 없음 (PermissionError)
+            return await loop.run_in_executor(None, input, "")
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+        
+        data = os.read(fd, 4096)
+        if not data:
+            if not _stdin_buffer:
+                raise EOFError
+            _stdin_buffer.extend(b"\n")  # 줄바꿈 없이 끝난 마지막 줄
+        _stdin_buffer.extend(data)
+    
+    line, _, rest = _stdin_buffer.partition(b"\n")
+    _stdin_buffer[:] = rest
+    return line.decode(sys.stdin.encoding or "utf-8", errors="replace").rstrip("\r")
+
 async def read_priority_array(app, target_device, target_object, priority):
-    """우선순위 배열 읽기"""
+    """우선순위 배열 요소 읽기 (NULL 슬롯은 NULL, 오류는 예외 객체 반환)"""
     try:
         request = ReadPropertyRequest(
-            objectIdentifier=ObjectIdentifier(target_object),
+            objectIdentifier=get_object_identifier(target_object),
             propertyIdentifier="priorityArray",
             propertyArrayIndex=priority
         )
-        request.pduDestination = Address(target_device)
+        request.pduDestination = get_address(target_device)
         
-        response = await asyncio.wait_for(app.request(request), timeout=5.0)
+        # 같은 장치로 동시에 나가는 요청 수 제한 (대기 시간은 요청 제한 시간에 포함하지 않음)
+        async with get_device_semaphore(target_device):
+            response = await request_with_retries(app, request)
         
-        if response and hasattr(response, 'propertyValue'):
-            value = response.propertyValue
-            # Null 체크
-            if value is None or str(value).upper() == 'NULL':
-                return "NULL"
-            if hasattr(value, 'value'):
-                if value.value is None or str(value.value).upper() == 'NULL':
-                    return "NULL"
-                return value.value
-            else:
-                return value
-        return None
-    except Exception as e:
-        return f"오류: {e}"
+        # NULL(비어 있는 슬롯)은 태그로 바로 판별
+        value = response.propertyValue
+        if is_null_value(value):
+            return NULL
+        return extract_value(value)
+    except (Exception, ErrorRejectAbortNack) as e:
+        # 오류는 예외 객체로 반환 (호출한 쪽에서 isinstance로 구분)
+        return e
 
-async def write_null_priority_array():
-    """priorityArray에 NULL 쓰기 - 가장 간단한 방법"""
-    
-    # BACnet 장치 설정
-    device = DeviceObject(
-        objectName="None Writer",
-        objectIdentifier=("device", 599),
-        maxApduLengthAccepted=1024,
-        segmentationSupported="segmentedBoth",
-        vendorIdentifier=15
-    )
+async def write_null_priority_array(app, target_device, target_object):
+    """priorityArray의 지정 우선순위를 NULL로 해제 (presentValue에 NULL 쓰기)"""
     
-    # 네트워크 설정
-    local_address = IPv4Address("200.0.0.234/24")
-    app = NormalApplication(device, local_address)
-    
-    # 타겟 설정
-    target_device = "200.0.0.162"
-    target_object = ("analogOutput", 1)
     priority = 1  # 우선순위 1
     
     print("=" * 50)
@@ -81,122 +102,46 @@ async def write_null_priority_array():
     print(f"현재 우선순위 {priority} 값: {current_value}")
     print()
     
-    if str(current_value) == "NULL":
+    if current_value is NULL:
         print("이미 NULL 상태입니다.")
         return
     
-    # NULL 쓰기 시도
-    print(f"우선순위 {priority}에 NULL 쓰기 시도...")
+    # NULL 쓰기 (priorityArray는 읽기 전용이므로 presentValue에 우선순위와 함께 NULL)
+    print(f"우선순위 {priority}에 NULL 쓰기...")
+    
+    request = WritePropertyRequest(
+        objectIdentifier=get_object_identifier(target_object),
+        propertyIdentifier="presentValue",
+        propertyValue=NULL_VALUE
+    )
+    request.priority = priority
+    request.pduDestination = get_address(target_device)
     
     try:
-        # WritePropertyRequest 생성 - propertyValue 없이
-        from bacpypes3.pdu import PDU
-        from bacpypes3.primitivedata import TagList, Tag, TagNumber
-        
-        # 수동으로 WriteProperty 요청 생성
-        request = WritePropertyRequest(
-            objectIdentifier=ObjectIdentifier(target_object),
-            propertyIdentifier="priorityArray",
-            propertyArrayIndex=priority
-        )
-        
-        # NULL 태그 추가 (태그 번호 8, NULL)
-        null_tag = Tag(TagNumber(8), b'')  # NULL 태그
-        
-        # propertyValue로 NULL 설정
-        from bacpypes3.constructeddata import Any
-        from bacpypes3.primitivedata import Null
-        
-        # NULL 값 설정 시도 1: 직접 None 사용
-        request.propertyValue = None
-        request.pduDestination = Address(target_device)
-        
-        print("  방법 1: None 값 전송...")
-        try:
-            response = await asyncio.wait_for(app.request(request), timeout=10.0)
-            if response:
-                print("  ✅ None 전송 성공")
-                await asyncio.sleep(1)
-                new_value = await read_priority_array(app, target_device, target_object, priority)
-                print(f"  변경 후 값: {new_value}")
-                if str(new_value) == "NULL":
-                    print("  🎉 성공적으로 NULL로 변경됨!")
-                    return
-        except Exception as e:
-            print(f"  ❌ 방법 1 실패: {e}")
-        
-        # NULL 값 설정 시도 2: 빈 Any 사용
-        print("\n  방법 2: 빈 Any() 전송...")
-        request.propertyValue = Any()
-        try:
-            response = await asyncio.wait_for(app.request(request), timeout=10.0)
-            if response:
-                print("  ✅ 빈 Any 전송 성공")
-                await asyncio.sleep(1)
-                new_value = await read_priority_array(app, target_device, target_object, priority)
-                print(f"  변경 후 값: {new_value}")
-                if str(new_value) == "NULL":
-                    print("  🎉 성공적으로 NULL로 변경됨!")
-                    return
-        except Exception as e:
-            print(f"  ❌ 방법 2 실패: {e}")
-        
-        # NULL 값 설정 시도 3: Real(0.0) 후 재시도
-        print("\n  방법 3: 0.0 쓰고 다시 시도...")
-        request.propertyValue = Any(Real(0.0))
-        try:
-            response = await asyncio.wait_for(app.request(request), timeout=10.0)
-            if response:
-                print("  ✅ 0.0 전송 성공")
-                # 바로 None 다시 시도
-                request.propertyValue = None
-                response = await asyncio.wait_for(app.request(request), timeout=10.0)
-                if response:
-                    print("  ✅ 후속 None 전송 성공")
-                    await asyncio.sleep(1)
-                    new_value = await read_priority_array(app, target_device, target_object, priority)
-                    print(f"  변경 후 값: {new_value}")
-                    if str(new_value) == "NULL":
-                        print("  🎉 성공적으로 NULL로 변경됨!")
-                        return
-        except Exception as e:
-            print(f"  ❌ 방법 3 실패: {e}")
-            
-    except Exception as e:
-        print(f"❌ 오류: {e}")
-        import traceback
-        traceback.print_exc()
+        await request_with_retries(app, request)
+    except (Exception, ErrorRejectAbortNack) as e:
+        # 장치가 거부하면 다른 방법으로 다시 시도하지 않고 오류를 그대로 표시
+        print(f"  ❌ NULL 쓰기 실패: {e}")
+        return
     
-    print("\n모든 방법 실패 - 장치가 NULL 쓰기를 지원하지 않을 수 있습니다.")
-
+    print("  ✅ NULL 전송 성공")
+    
+    # 쓰기 응답(SimpleACK)을 받았으면 이미 반영되었으므로 바로 확인
+    new_value = await read_priority_array(app, target_device, target_object, priority)
+    print(f"  변경 후 값: {new_value}")
+    if new_value is NULL:
+        print("  🎉 성공적으로 NULL로 변경됨!")
 
-async def release_priority():
+async def release_priority(app, target_device, target_object):
     """우선순위 해제 (Release) - presentValue 사용"""
     
-    # BACnet 장치 설정
-    device = DeviceObject(
-        objectName="Priority Releaser",
-        objectIdentifier=("device", 599),
-        maxApduLengthAccepted=1024,
-        segmentationSupported="segmentedBoth",
-        vendorIdentifier=15
-    )
-    
-    # 네트워크 설정
-    local_address = IPv4Address("200.0.0.234/24")
-    app = NormalApplication(device, local_address)
-    
-    # 타겟 설정
-    target_device = "200.0.0.162"
-    target_object = ("analogOutput", 1)
-    
     print("=" * 50)
     print("BACnet 우선순위 해제 (Release)")
     print("=" * 50)
     print(f"타겟: {target_device} - {target_object}")
     print()
     
-    priority = int(input("해제할 우선순위 번호 (1-16): "))
+    priority = int(await ainput("해제할 우선순위 번호 (1-16): "))
     
     if priority < 1 or priority > 16:
         print("잘못된 우선순위 번호입니다.")
@@ -205,29 +150,26 @@ async def release_priority():
     print(f"\n우선순위 {priority} 해제 중...")
     
     try:
-        # presentValue에 쓰기 (우선순위 지정, 값 없음)
+        # presentValue에 우선순위와 함께 NULL 쓰기 (propertyValue는 필수 요소라 비워 보낼 수 없음)
         request = WritePropertyRequest(
-            objectIdentifier=ObjectIdentifier(target_object),
-            propertyIdentifier="presentValue"
+            objectIdentifier=get_object_identifier(target_object),
+            propertyIdentifier="presentValue",
+            propertyValue=NULL_VALUE
         )
         request.priority = priority
-        request.pduDestination = Address(target_device)
-        
-        # propertyValue를 설정하지 않거나 None으로 설정
-        request.propertyValue = None
+        request.pduDestination = get_address(target_device)
         
         print("  Release 명령 전송 중...")
-        response = await asyncio.wait_for(app.request(request), timeout=10.0)
+        response = await request_with_retries(app, request)
         
         if response:
             print("  ✅ Release 명령 전송 성공")
             
-            # 결과 확인
-            await asyncio.sleep(1)
+            # 결과 확인 (응답을 받았으면 이미 반영되었으므로 대기 없이 읽기)
             new_value = await read_priority_array(app, target_device, target_object, priority)
             print(f"  변경 후 우선순위 {priority} 값: {new_value}")
             
-            if str(new_value) == "NULL":
+            if new_value is NULL:
                 print("  🎉 성공적으로 해제되었습니다!")
             else:
                 print("  ⚠️ 명령은 성공했지만 값이 변경되지 않았습니다.")
@@ -238,25 +180,98 @@ async def release_priority():
         print(f"❌ 오류: {e}")
 
 
-async def check_all_priorities():
-    """모든 우선순위 상태 확인"""
-    
-    # BACnet 장치 설정
-    device = DeviceObject(
-        objectName="Priority Checker",
-        objectIdentifier=("device", 599),
-        maxApduLengthAccepted=1024,
-        segmentationSupported="segmentedBoth",
-        vendorIdentifier=15
+async def read_all_priorities(app, target_device, target_object):
+    """우선순위 1-16 값 읽기"""
+    # 16개 읽기를 함께 시작하고 모두 응답할 때까지 대기 (동시 요청 수는 장치별 세마포어로 제한)
+    return await asyncio.gather(
+        *[read_priority_array(app, target_device, target_object, priority) for priority in range(1, 17)],
+        return_exceptions=True
     )
+
+
+class PriorityWatcher:
+    """COV 구독으로 현재 값 변경 알림을 받아, 조회할 때 변경 여부를 함께 보여 줌
     
-    # 네트워크 설정
-    local_address = IPv4Address("200.0.0.234/24")
-    app = NormalApplication(device, local_address)
+    COV 알림은 presentValue/statusFlags가 바뀔 때만 오므로 다른 클라이언트가
+    낮은 우선순위 슬롯에 쓴 경우는 알 수 없다. 그래서 우선순위 배열은 조회할 때마다
+    다시 읽고, 이전에 읽은 값과 알림 횟수는 변경 표시용 참고 정보로만 쓴다.
+    """
     
-    # 타겟 설정
-    target_device = "200.0.0.162"
-    target_object = ("analogOutput", 1)
+    # 종료 시 구독 취소 응답을 기다리는 최대 시간(초)
+    STOP_TIMEOUT = 3.0
+    
+    def __init__(self, app, target_device, target_object):
+        self.app = app
+        self.target_device = target_device
+        self.target_object = target_object
+        self.values = None  # 마지막으로 읽은 우선순위 1-16 값
+        self.changes = 0    # 마지막 조회 이후 받은 현재 값 변경 알림 수
+        self.task = None
+        self._stopping = asyncio.Event()
+    
+    async def start(self):
+        """COV 구독 시작 (장치가 지원하지 않으면 False)"""
+        started = asyncio.get_running_loop().create_future()
+        self.task = asyncio.create_task(self._watch(started))
+        return await started
+    
+    async def _watch(self, started):
+        """stop()이 호출될 때까지 구독을 유지하며 알림 수 세기"""
+        try:
+            async with self.app.change_of_value(
+                get_address(self.target_device), get_object_identifier(self.target_object)
+            ) as subscription:
+                started.set_result(True)
+                while not self._stopping.is_set():
+                    notification = asyncio.ensure_future(subscription.get())
+                    stopping = asyncio.ensure_future(self._stopping.wait())
+                    done, pending = await asyncio.wait(
+                        {notification, stopping}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in pending:
+                        task.cancel()
+                    if notification in done:
+                        # 한 번의 변경에 여러 속성 알림이 오므로 쌓인 알림을 함께 처리
+                        while not subscription.queue.empty():
+                            subscription.queue.get_nowait()
+                        self.changes += 1
+            # 블록을 정상적으로 빠져나오면 구독 취소 요청이 전송됨
+        except (Exception, ErrorRejectAbortNack) as e:
+            if not started.done():
+                print(f"COV 구독 실패 ({e}), 변경 알림 없이 직접 읽습니다.")
+                started.set_result(False)
+            else:
+                print(f"COV 감시 중단: {e}")
+        finally:
+            self.task = None
+    
+    async def read(self):
+        """우선순위 1-16 값을 다시 읽어 (값, 이전 값, 그 사이 받은 변경 알림 수) 반환"""
+        previous, changes = self.values, self.changes
+        self.changes = 0
+        self.values = await read_all_priorities(self.app, self.target_device, self.target_object)
+        return self.values, previous, changes
+    
+    async def stop(self):
+        """감시 중단 (구독 취소 요청을 보내고 응답을 기다림)"""
+        task = self.task
+        if task is not None:
+            self._stopping.set()
+            try:
+                await asyncio.wait_for(task, self.STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                print("COV 구독 취소 응답 없음")
+
+
+def _same_slot(value, previous):
+    """두 번의 조회에서 같은 우선순위 슬롯 값이 같은지 비교"""
+    if isinstance(value, BaseException) or isinstance(previous, BaseException):
+        return True  # 읽기 오류는 변경으로 표시하지 않음
+    return value is previous or value == previous
+
+
+async def check_all_priorities(app, target_device, target_object, watcher=None):
+    """모든 우선순위 상태 확인 (watcher가 있으면 이전 조회 이후 바뀐 슬롯 표시)"""
     
     print("=" * 50)
     print("모든 우선순위 상태 확인")
@@ -265,48 +280,80 @@ async def check_all_priorities():
     print()
     
     active_count = 0
+    previous = None
+    
+    # 낮은 우선순위 슬롯 변경은 COV 알림이 오지 않으므로 항상 다시 읽음
+    if watcher is not None:
+        values, previous, changes = await watcher.read()
+    else:
+        values = await read_all_priorities(app, target_device, target_object)
     
-    for priority in range(1, 17):
-        value = await read_priority_array(app, target_device, target_object, priority)
+    for priority, value in enumerate(values, 1):
+        changed = ""
+        if previous is not None and not _same_slot(value, previous[priority - 1]):
+            changed = " (변경됨)"
         
-        if str(value) != "NULL" and "오류" not in str(value):
-            print(f"우선순위 {priority:2d}: {value} [활성]")
-            active_count += 1
+        if isinstance(value, BaseException):
+            print(f"우선순위 {priority:2d}: 읽기 오류 ({value})")
+        elif value is NULL:
+            print(f"우선순위 {priority:2d}: NULL{changed}")
         else:
-            print(f"우선순위 {priority:2d}: NULL")
+            print(f"우선순위 {priority:2d}: {value} [활성]{changed}")
+            active_count += 1
     
     print()
     print(f"활성 우선순위 개수: {active_count}/16")
+    if previous is not None:
+        print(f"이전 확인 이후 현재 값 변경 알림: {changes}회")
 
 
 async def main():
     """메인 함수"""
     
-    while True:
-        print("\n" + "=" * 50)
-        print("BACnet 우선순위 NULL 설정 도구")
-        print("=" * 50)
-        print("1. 우선순위 1에 NULL 쓰기 시도")
-        print("2. 우선순위 해제 (Release)")
-        print("3. 모든 우선순위 상태 확인")
-        print("4. 종료")
-        
-        choice = input("\n선택 (1/2/3/4): ").strip()
-        
-        if choice == "1":
-            await write_null_priority_array()
-        elif choice == "2":
-            await release_priority()
-        elif choice == "3":
-            await check_all_priorities()
-        elif choice == "4":
-            print("프로그램을 종료합니다.")
-            break
-        else:
-            print("잘못된 선택입니다.")
-        
-        input("\n계속하려면 Enter를 누르세요...")
-
+    # 타겟 설정
+    target_device = "200.0.0.162"
+    target_object = ("analogOutput", 1)
+    max_requests = 4  # 장치에 동시에 보낼 최대 요청 수 (느린 현장 장치는 줄이기)
+    
+    configure_concurrency(target_device, max_requests)
+    
+    # 애플리케이션(소켓)은 한 번만 만들어 모든 메뉴에서 사용하고 종료 시 닫기
+    app = await get_app("BACnet Priority Tool")
+    
+    # 현재 값 변경 알림 구독 (조회 때 변경 표시용, 우선순위 배열은 항상 다시 읽음)
+    watcher = PriorityWatcher(app, target_device, target_object)
+    if not await watcher.start():
+        watcher = None
+    
+    try:
+        while True:
+            print("\n" + "=" * 50)
+            print("BACnet 우선순위 NULL 설정 도구")
+            print("=" * 50)
+            print("1. 우선순위 1에 NULL 쓰기 시도")
+            print("2. 우선순위 해제 (Release)")
+            print("3. 모든 우선순위 상태 확인")
+            print("4. 종료")
+            
+            choice = (await ainput("\n선택 (1/2/3/4): ")).strip()
+            
+            if choice == "1":
+                await write_null_priority_array(app, target_device, target_object)
+            elif choice == "2":
+                await release_priority(app, target_device, target_object)
+            elif choice == "3":
+                await check_all_priorities(app, target_device, target_object, watcher)
+            elif choice == "4":
+                print("프로그램을 종료합니다.")
+                break
+            else:
+                print("잘못된 선택입니다.")
+            
+            await ainput("\n계속하려면 Enter를 누르세요...")
+    finally:
+        if watcher is not None:
+            await watcher.stop()
+        close_app()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
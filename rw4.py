@@ -1,87 +1,72 @@
 #!/usr/bin/env python3
 import asyncio
-from bacpypes3.local.device import DeviceObject
-from bacpypes3.pdu import Address, IPv4Address
-from bacpypes3.primitivedata import ObjectIdentifier, Real, Null
+from bacpypes3.primitivedata import Real, Null
 from bacpypes3.apdu import ReadPropertyRequest, WritePropertyRequest
-from bacpypes3.ipv4.app import NormalApplication
 from bacpypes3.constructeddata import Any
+from bacnet_utils import app_session, extract_value, encode_as, get_object_identifier, get_address, read_confirmed, read_property_multiple
 
 _debug = 0
 
-def extract_value(bacnet_value):
-    if bacnet_value is None:
-        return None
-    try:
-        from bacpypes3.primitivedata import Real, CharacterString
-        real_val = bacnet_value.cast_out(Real)
-        if real_val is not None:
-            return float(real_val)
-        str_val = bacnet_value.cast_out(CharacterString)
-        if str_val is not None:
-            return str(str_val)
-        return str(bacnet_value)
-    except Exception:
-        return f"값 추출 실패: {bacnet_value}"
+# 우선순위 해제용 NULL 값 (Null()은 인코딩되지 않으므로 빈 튜플로 생성, 반복 해제에 재사용)
+NULL_VALUE = Any(Null(()))
 
 async def read_property(app, target_device, object_id, property_id):
-    req = ReadPropertyRequest(objectIdentifier=ObjectIdentifier(object_id),
+    req = ReadPropertyRequest(objectIdentifier=get_object_identifier(object_id),
                               propertyIdentifier=property_id)
-    req.pduDestination = Address(target_device)
+    req.pduDestination = get_address(target_device)
     resp = await app.request(req)
     if resp:
         return extract_value(resp.propertyValue)
     return None
 
+async def read_properties(app, target_device, object_id, *property_ids):
+    """같은 객체의 여러 속성을 ReadPropertyMultiple 한 번으로 읽어 튜플로 반환"""
+    values = await read_property_multiple(app, target_device, object_id, [(prop, None) for prop in property_ids])
+    if values is None:
+        # ReadPropertyMultiple을 지원하지 않는 장치는 속성별로 동시에 읽기
+        return tuple(await asyncio.gather(
+            *[read_property(app, target_device, object_id, prop) for prop in property_ids]
+        ))
+    return tuple(extract_value(values[(prop, None)]) for prop in property_ids)
+
 async def write_single_value(app, target_device, object_id, property_id, value, priority=16):
     print(f"\n쓰기 대상: {target_device}, 객체: {object_id}, 속성: {property_id}, 값: {value}, 우선순위: {priority}")
 
-    obj_name = await read_property(app, target_device, object_id, "objectName")
+    obj_name, current = await read_properties(app, target_device, object_id, "objectName", property_id)
     print("객체 이름:", obj_name or "읽을 수 없음")
-
-    current = await read_property(app, target_device, object_id, property_id)
     print("현재 값:", current if current is not None else "읽을 수 없음")
 
     if value is None:
-        bacnet_value = Any(Null())
+        bacnet_value = NULL_VALUE
     else:
-        bacnet_value = Any(Real(value))
+        bacnet_value = encode_as(Real, value)
 
     req = WritePropertyRequest(
-        objectIdentifier=ObjectIdentifier(object_id),
+        objectIdentifier=get_object_identifier(object_id),
         propertyIdentifier=property_id,
         propertyValue=bacnet_value
     )
     req.priority = priority
-    req.pduDestination = Address(target_device)
+    req.pduDestination = get_address(target_device)
 
     resp = await app.request(req)
     if resp:
         print("쓰기 성공")
-        await asyncio.sleep(0.5)
-        new = await read_property(app, target_device, object_id, property_id)
+        # 고정 대기 없이 읽고, 값이 아직 다르면 짧게 재시도
+        new = await read_confirmed(app, target_device, object_id, property_id, value)
         print("확인된 값:", new)
     else:
         print("응답 없음, 실패")
 
 async def main():
-    # 앱과 로컬 장치 초기화 (한 번만)
-    device = DeviceObject(
-        objectName="BACnetWriter",
-        objectIdentifier=("device", 599),
-        maxApduLengthAccepted=1024,
-        segmentationSupported="segmentedBoth",
-        vendorIdentifier=15
-    )
-    local_address = IPv4Address("0.0.0.234/24")
-    app = NormalApplication(device, local_address)
-
     target = "200.0.0.162"
     obj_id = ("analogOutput", 1)
     prop = "presentValue"
 
-    #await write_single_value(app, target, obj_id, prop, 43, priority=2)
-    await write_single_value(app, target, obj_id, prop, None, priority=2)
+    # 앱은 한 번만 만들고 종료 시 소켓 닫기
+    async with app_session("BACnetWriter") as app:
+        #await write_single_value(app, target, obj_id, prop, 43, priority=2)
+        await write_single_value(app, target, obj_id, prop, None, priority=2)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,94 +1,25 @@
 #!/usr/bin/env python3
 
 import asyncio
-from bacpypes3.local.device import DeviceObject
-from bacpypes3.pdu import Address, IPv4Address
-from bacpypes3.primitivedata import ObjectIdentifier, Real, Unsigned
-from bacpypes3.apdu import ReadPropertyRequest, WritePropertyRequest
-from bacpypes3.ipv4.app import NormalApplication
-from bacpypes3.constructeddata import Any
+from bacpypes3.pdu import Address
+from bacpypes3.primitivedata import ObjectIdentifier, CharacterString
+from bacpypes3.apdu import WritePropertyRequest, ErrorRejectAbortNack
+from bacpypes3.constructeddata import ArrayOf
+from bacnet_utils import get_logger, app_session, extract_value, encode_value, read_property_multiple, read_confirmed, read_property
 
 # 디버깅 비활성화
 _debug = 0
 
-def extract_value(bacnet_value):
-    """BACnet Any 객체에서 실제 값 추출 (multiState 지원 버전)"""
-    if bacnet_value is None:
-        return None
-    
-    try:
-        from bacpypes3.primitivedata import Real, Unsigned, CharacterString, Boolean, Enumerated
-        
-        # 정수형(multiState) 시도
-        try:
-            uint_val = bacnet_value.cast_out(Unsigned)
-            if uint_val is not None:
-                return int(uint_val)
-        except:
-            pass
-        
-        # 실수형 시도
-        try:
-            real_val = bacnet_value.cast_out(Real)
-            if real_val is not None:
-                return float(real_val)
-        except:
-            pass
-        
-        # 문자열 시도
-        try:
-            str_val = bacnet_value.cast_out(CharacterString)
-            if str_val is not None:
-                return str(str_val)
-        except:
-            pass
-        
-        # 직접 문자열 변환 시도
-        return str(bacnet_value)
-        
-    except:
-        return f"값 추출 실패: {bacnet_value}"
-
-async def read_property(app, device_address, object_id, property_id):
-    """BACnet 속성 읽기 함수"""
-    try:
-        request = ReadPropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
-            propertyIdentifier=property_id
-        )
-        request.pduDestination = Address(device_address)
-        
-        response = await app.request(request)
-        if response:
-            return extract_value(response.propertyValue)
-        else:
-            return None
-    except Exception as e:
-        print(f"읽기 오류 ({object_id}.{property_id}): {e}")
-        return None
+logger = get_logger(__name__)
 
 async def write_property(app, device_address, object_id, property_id, value, priority=None):
     """BACnet 속성 쓰기 함수"""
     try:
-        from bacpypes3.primitivedata import Real, Unsigned, CharacterString, Boolean
-        
-        # 값의 타입에 따라 적절한 BACnet 타입으로 변환
-        if isinstance(value, float):
-            bacnet_value = Any(Real(value))
-        elif isinstance(value, int):
-            bacnet_value = Any(Unsigned(value))  # multiState는 정수로 처리
-        elif isinstance(value, str):
-            bacnet_value = Any(CharacterString(value))
-        elif isinstance(value, bool):
-            bacnet_value = Any(Boolean(value))
-        else:
-            bacnet_value = Any(CharacterString(str(value)))
-        
-        # 쓰기 요청 생성
+        # 쓰기 요청 생성 (값의 타입별로 BACnet 타입 선택, multiState의 int는 Unsigned)
         request = WritePropertyRequest(
             objectIdentifier=ObjectIdentifier(object_id),
             propertyIdentifier=property_id,
-            propertyValue=bacnet_value
+            propertyValue=encode_value(value)
         )
         
         # 우선순위 설정
@@ -101,21 +32,50 @@ async def write_property(app, device_address, object_id, property_id, value, pri
         response = await app.request(request)
         return response is not None
         
-    except Exception as e:
+    except (Exception, ErrorRejectAbortNack) as e:
         print(f"쓰기 오류 ({object_id}.{property_id}): {e}")
         return False
 
-async def read_multistate_info(app, device_address, object_id):
-    """multiStateValue 객체의 상태 텍스트 목록 읽기"""
+# multiStateValue 조회에 필요한 속성 (한 번의 ReadPropertyMultiple로 읽음)
+_MULTISTATE_PROPS = ["objectName", "presentValue", "stateText", "numberOfStates"]
+
+def extract_state_texts(bacnet_value):
+    """stateText(CharacterString 배열) 값을 문자열 목록으로 변환"""
+    if bacnet_value is None:
+        return None
+    try:
+        return [str(text) for text in bacnet_value.cast_out(ArrayOf(CharacterString))]
+    except Exception:
+        return None
+
+async def read_multistate_properties(app, device_address, object_id):
+    """objectName, presentValue, stateText, numberOfStates를 한 번에 읽어 {속성: 값} 반환"""
+    values = await read_property_multiple(app, device_address, object_id, [(prop, None) for prop in _MULTISTATE_PROPS])
+    if values is not None:
+        values_raw = [values[(prop, None)] for prop in _MULTISTATE_PROPS]
+    else:
+        # ReadPropertyMultiple을 지원하지 않는 장치는 속성별로 동시에 읽기
+        values_raw = await asyncio.gather(
+            *[read_property(app, device_address, object_id, prop) for prop in _MULTISTATE_PROPS]
+        )
+    
+    properties = dict(zip(_MULTISTATE_PROPS, values_raw))
+    properties["stateText"] = extract_state_texts(properties["stateText"])
+    for prop in ("objectName", "presentValue", "numberOfStates"):
+        properties[prop] = extract_value(properties[prop])
+    return properties
+
+def get_state_texts(properties):
+    """읽어 온 속성에서 multiStateValue 객체의 상태 텍스트 목록 구하기"""
     try:
-        # 상태 텍스트 목록 읽기
-        state_texts = await read_property(app, device_address, object_id, "stateText")
+        # 상태 텍스트 목록
+        state_texts = properties["stateText"]
         if state_texts:
             print(f"상태 텍스트: {state_texts}")
             return state_texts
         else:
-            # 상태 텍스트를 읽을 수 없는 경우 값 목록 읽기 시도
-            number_of_states = await read_property(app, device_address, object_id, "numberOfStates")
+            # 상태 텍스트를 읽을 수 없는 경우 상태 수로 목록 만들기
+            number_of_states = properties["numberOfStates"]
             if number_of_states:
                 print(f"상태 수: {number_of_states}")
                 return [f"상태 {i}" for i in range(1, int(number_of_states) + 1)]
@@ -126,37 +86,25 @@ async def read_multistate_info(app, device_address, object_id):
         print(f"상태 정보 읽기 오류: {e}")
         return None
 
-async def manage_multistate_value(target_device, object_id, new_state=None):
+async def manage_multistate_value(app, target_device, object_id, new_state=None):
     """multiStateValue 객체 읽기 및 쓰기"""
     try:
-        # 기본 디바이스 설정
-        device = DeviceObject(
-            objectName="BACnet MultiState Manager",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        # 애플리케이션 생성
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
-        
         print(f"타겟 디바이스: {target_device}")
         print(f"객체: {object_id}")
         
-        # 객체 이름 읽기
-        object_name = await read_property(app, target_device, object_id, "objectName")
+        # 객체 이름, 현재 상태, 상태 정보를 한 번에 읽기
+        properties = await read_multistate_properties(app, target_device, object_id)
+        
+        object_name = properties["objectName"]
         if object_name:
             print(f"객체 이름: {object_name}")
         else:
             print("객체 이름을 읽을 수 없습니다.")
         
-        # 현재 상태 읽기
-        current_state = await read_property(app, target_device, object_id, "presentValue")
+        current_state = properties["presentValue"]
         
-        # 상태 텍스트 정보 읽기
-        state_info = await read_multistate_info(app, target_device, object_id)
+        # 상태 텍스트 정보
+        state_info = get_state_texts(properties)
         
         if current_state is not None:
             state_text = f"상태 {current_state}"
@@ -177,9 +125,8 @@ async def manage_multistate_value(target_device, object_id, new_state=None):
             if success:
                 print(f"성공: {object_id}.presentValue = {new_state} (우선순위: 16)")
                 
-                # 확인을 위해 다시 읽기
-                await asyncio.sleep(0.5)
-                updated_state = await read_property(app, target_device, object_id, "presentValue")
+                # 확인을 위해 다시 읽기 (고정 대기 없이, 값이 아직 다르면 짧게 재시도)
+                updated_state = await read_confirmed(app, target_device, object_id, "presentValue", new_state)
                 
                 if updated_state is not None:
                     state_text = f"상태 {updated_state}"
@@ -201,9 +148,7 @@ async def manage_multistate_value(target_device, object_id, new_state=None):
         return True
     
     except Exception as e:
-        print(f"오류: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"오류: {e}")
         return False
 
 async def main():
@@ -216,8 +161,9 @@ async def main():
     # 주석 처리하면 읽기만 수행
     # new_state = None
     
-    # 실행
-    await manage_multistate_value(target_device, object_id, new_state)
+    # 실행 (종료 시 소켓 닫기)
+    async with app_session("BACnet MultiState Manager") as app:
+        await manage_multistate_value(app, target_device, object_id, new_state)
 
 if __name__ == "__main__":
     print("BACnet MultiState 값 관리 도구")
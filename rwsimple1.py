@@ -1,162 +1,146 @@
 #!/usr/bin/env python3
 
 import asyncio
-from bacpypes3.local.device import DeviceObject
-from bacpypes3.pdu import Address, IPv4Address
-from bacpypes3.primitivedata import ObjectIdentifier, Real
-from bacpypes3.apdu import ReadPropertyRequest, WritePropertyRequest
-from bacpypes3.ipv4.app import NormalApplication
-from bacpypes3.constructeddata import Any
+from bacpypes3.primitivedata import Real
+from bacpypes3.apdu import ReadPropertyRequest, ErrorRejectAbortNack
+from bacnet_utils import get_logger, use_queued_logging, app_session, install_uvloop, extract_value, encode_as, get_object_identifier, get_address, read_confirmed, same_value, write_batched
 
 # 디버깅 비활성화
 _debug = 0
 
-def extract_value(bacnet_value):
-    """BACnet Any 객체에서 실제 값 추출 (간소화 버전)"""
-    if bacnet_value is None:
-        return None
-    
-    try:
-        from bacpypes3.primitivedata import Real, Unsigned, CharacterString, Boolean
-        
-        # 실수형 시도
-        try:
-            real_val = bacnet_value.cast_out(Real)
-            if real_val is not None:
-                return float(real_val)
-        except:
-            pass
-        
-        # 문자열 시도
-        try:
-            str_val = bacnet_value.cast_out(CharacterString)
-            if str_val is not None:
-                return str(str_val)
-        except:
-            pass
-        
-        # 직접 문자열 변환 시도
-        return str(bacnet_value)
-        
-    except:
-        return f"값 추출 실패: {bacnet_value}"
+logger = get_logger(__name__)
 
-async def read_property(app, device_address, object_id, property_id):
+async def read_property(app, device_address, object_id, property_id, property_index=None):
     """BACnet 속성 읽기 함수"""
     try:
         request = ReadPropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
-            propertyIdentifier=property_id
+            objectIdentifier=get_object_identifier(object_id),
+            propertyIdentifier=property_id,
+            propertyArrayIndex=property_index
         )
-        request.pduDestination = Address(device_address)
+        request.pduDestination = get_address(device_address)
         
+        # 응답이 없거나 오류면 예외가 발생하므로 응답은 항상 ACK
         response = await app.request(request)
-        if response:
-            return extract_value(response.propertyValue)
-        else:
-            return None
-    except Exception as e:
-        print(f"읽기 오류 ({object_id}.{property_id}): {e}")
+        return extract_value(response.propertyValue)
+    except (Exception, ErrorRejectAbortNack) as e:
+        logger.info(f"읽기 오류 ({object_id}.{property_id}): {e}")
         return None
 
-async def write_single_value(target_device, object_id, property_id, value, priority=16):
-    """단순화된 단일 값 쓰기 함수"""
+async def write_single_value(app, target_device, object_id, property_id, value, priority=16, verify=False):
+    """단순화된 단일 값 쓰기 함수
+    
+    WriteProperty는 확인형 서비스이므로 SimpleACK를 받으면 장치에 반영된 것으로 보고
+    바로 반환한다. verify=True이면 다시 읽어 값을 확인한다.
+    """
     try:
-        # 기본 디바이스 설정
-        device = DeviceObject(
-            objectName="BACnet Writer",
-            objectIdentifier=("device", 599),
-            maxApduLengthAccepted=1024,
-            segmentationSupported="segmentedBoth",
-            vendorIdentifier=15
-        )
-        
-        # 애플리케이션 생성
-        local_address = IPv4Address("200.0.0.234/24")
-        app = NormalApplication(device, local_address)
+        logger.info(f"타겟 디바이스: {target_device}")
+        logger.info(f"객체: {object_id}, 속성: {property_id}")
+        logger.info(f"설정 값: {value}, 우선순위: {priority}")
         
-        print(f"타겟 디바이스: {target_device}")
-        print(f"객체: {object_id}, 속성: {property_id}")
-        print(f"설정 값: {value}, 우선순위: {priority}")
+        # 우선순위 쓰기는 현재 값이 같아도 해당 우선순위 슬롯은 비어 있을 수 있으므로 슬롯 값도 읽음
+        commanded = property_id == "presentValue" and priority is not None
         
-        # 객체 이름 읽기
-        object_name = await read_property(app, target_device, object_id, "objectName")
+        # 객체 이름, 현재 값 (우선순위 슬롯 값)을 동시에 읽기
+        reads = [
+            read_property(app, target_device, object_id, "objectName"),
+            read_property(app, target_device, object_id, property_id)
+        ]
+        if commanded:
+            reads.append(read_property(app, target_device, object_id, "priorityArray", priority))
+        object_name, current_value, *slot_value = await asyncio.gather(*reads)
         if object_name:
-            print(f"객체 이름: {object_name}")
+            logger.info(f"객체 이름: {object_name}")
         else:
-            print("객체 이름을 읽을 수 없습니다.")
+            logger.info("객체 이름을 읽을 수 없습니다.")
         
-        # 현재 값 읽기
-        current_value = await read_property(app, target_device, object_id, property_id)
         if current_value is not None:
-            print(f"현재 값: {current_value}")
+            logger.info(f"현재 값: {current_value}")
         else:
-            print("현재 값을 읽을 수 없습니다.")
+            logger.info("현재 값을 읽을 수 없습니다.")
         
-        # 새 값 쓰기
-        print(f"\n새 값 쓰기 중...")
-        
-        # 실수값을 BACnet 형식으로 변환
-        bacnet_value = Any(Real(value))
+        # 같은 값이 이미 설정되어 있으면 쓰기와 확인 읽기 생략
+        set_value = slot_value[0] if commanded else current_value
+        if set_value is not None and same_value(set_value, value):
+            logger.info("이미 같은 값이 설정되어 있어 쓰지 않습니다.")
+            return True
         
-        # 쓰기 요청 생성
-        request = WritePropertyRequest(
-            objectIdentifier=ObjectIdentifier(object_id),
-            propertyIdentifier=property_id,
-            propertyValue=bacnet_value
-        )
+        # 새 값 쓰기
+        logger.info("\n새 값 쓰기 중...")
         
-        # 우선순위 설정
-        if priority is not None:
-            request.priority = priority
-            
-        request.pduDestination = Address(target_device)
+        # 실수값을 BACnet 형식으로 변환 (같은 값은 캐시된 객체 재사용)
+        bacnet_value = encode_as(Real, value)
         
-        # 요청 전송
-        response = await app.request(request)
+        # 요청 전송 (동시에 들어온 다른 쓰기와 WritePropertyMultiple로 묶일 수 있음)
+        success = await write_batched(app, target_device, object_id, property_id, bacnet_value, priority)
         
-        if response:
-            print(f"성공: {object_id}.{property_id} = {value} (우선순위: {priority})")
+        if success:
+            logger.info(f"성공: {object_id}.{property_id} = {value} (우선순위: {priority})")
+            if not verify:
+                return True
             
-            # 확인을 위해 다시 읽기
-            await asyncio.sleep(0.5)  # 잠시 대기
-            new_value = await read_property(app, target_device, object_id, property_id)
+            # 확인을 위해 다시 읽기 (고정 대기 없이, 값이 아직 다르면 짧게 재시도)
+            new_value = await read_confirmed(app, target_device, object_id, property_id, value)
             
             if new_value is not None:
-                print(f"확인된 값: {new_value}")
+                logger.info(f"확인된 값: {new_value}")
                 
                 # 값이 제대로 설정되었는지 확인
-                if float(new_value) == float(value):
-                    print("✓ 값이 성공적으로 변경되었습니다.")
+                if same_value(new_value, value):
+                    logger.info("✓ 값이 성공적으로 변경되었습니다.")
                 else:
-                    print(f"! 값이 다릅니다. 예상: {value}, 실제: {new_value}")
+                    logger.info(f"! 값이 다릅니다. 예상: {value}, 실제: {new_value}")
             else:
-                print("확인 값을 읽을 수 없습니다.")
+                logger.info("확인 값을 읽을 수 없습니다.")
             
             return True
         else:
-            print("실패: 응답 없음")
+            logger.info("실패: 쓰기 거부 또는 응답 없음")
             return False
             
+    except (asyncio.TimeoutError, ErrorRejectAbortNack) as e:
+        # 통신 오류는 스택 정보 없이 기록
+        logger.info(f"오류: {e}")
+        return False
     except Exception as e:
-        print(f"오류: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"오류: {e}")
         return False
 
+# write_many에서 동시에 진행하는 최대 쓰기 수 (장치별 요청 수는 bacnet_utils의 장치별 세마포어로도 제한됨)
+WRITE_MANY_CONCURRENCY = 32
+
+async def write_many(app, targets, concurrency=WRITE_MANY_CONCURRENCY):
+    """여러 장치/객체에 동시에 쓰기
+    
+    targets는 (타겟 디바이스, 객체, 속성, 값, 우선순위) 튜플 목록이며,
+    결과는 같은 순서의 성공 여부(또는 예외) 목록으로 반환한다.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def write_one(target):
+        async with semaphore:
+            return await write_single_value(app, *target)
+    
+    return await asyncio.gather(*[write_one(target) for target in targets], return_exceptions=True)
+
 async def main():
     """메인 함수"""
     # 설정값
     target_device = "200.0.0.162"
-    object_id = ("analogOutput", 1)
+    object_id = get_object_identifier(("analogOutput", 1))  # 한 번만 변환해 모든 요청에 사용
     property_id = "presentValue"
     value = 43
     priority = 1
     
-    # 쓰기 실행
-    await write_single_value(target_device, object_id, property_id, value, priority)
+    # 쓰기 실행 (종료 시 소켓 닫기)
+    async with app_session("BACnet Writer") as app:
+        await write_single_value(app, target_device, object_id, property_id, value, priority, verify=True)
 
 if __name__ == "__main__":
-    print("BACnet 단일 값 쓰기 도구 (간소화 버전)")
-    print("===============================")
+    # 모든 출력이 로거를 거치므로 콘솔 기록은 별도 스레드에서
+    use_queued_logging()
+    logger.info("BACnet 단일 값 쓰기 도구 (간소화 버전)")
+    logger.info("===============================")
+    # uvloop이 있으면 사용
+    install_uvloop()
     asyncio.run(main())
\ No newline at end of file
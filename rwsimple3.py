@@ -1,48 +1,49 @@
 import asyncio
-from bacpypes3.local.device import DeviceObject
-from bacpypes3.pdu import Address, IPv4Address
-from bacpypes3.primitivedata import ObjectIdentifier, Null
-from bacpypes3.apdu import WritePropertyRequest
-from bacpypes3.ipv4.app import NormalApplication
+from bacpypes3.primitivedata import Null
 from bacpypes3.constructeddata import Any
+from bacnet_utils import get_logger, use_queued_logging, app_session, install_uvloop, write_batched
 
-async def write_priority_null(app, target_ip, obj_type, obj_inst, prop_id, priority_slot):
-    # Null 값을 Any로 래핑
-    bacnet_value = Any(Null())
+logger = get_logger(__name__)
 
-    request = WritePropertyRequest(
-        objectIdentifier=ObjectIdentifier((obj_type, obj_inst)),
-        propertyIdentifier=prop_id,
-        propertyValue=bacnet_value,
-        priority=priority_slot
-    )
-    request.pduDestination = Address(target_ip)
+# 우선순위 해제용 NULL 값 (모든 우선순위에 같은 값을 재사용, Null()은 인코딩되지 않으므로 빈 튜플로 생성)
+NULL_VALUE = Any(Null(()))
 
-    response = await app.request(request)
-    if response:
-        print(f"Priority {priority_slot} null write succeeded on {obj_type} {obj_inst} {prop_id}")
+async def write_priority_null(app, target_ip, obj_type, obj_inst, prop_id, priority_slot):
+    # 동시에 호출된 다른 쓰기와 WritePropertyMultiple로 묶일 수 있음
+    success = await write_batched(app, target_ip, (obj_type, obj_inst), prop_id, NULL_VALUE, priority_slot)
+    if success:
+        logger.info(f"Priority {priority_slot} null write succeeded on {obj_type} {obj_inst} {prop_id}")
     else:
-        print("Write failed or no response")
+        logger.info("Write failed or no response")
 
-async def main():
-    device = DeviceObject(
-        objectName="LocalDevice",
-        objectIdentifier=("device", 1234),
-        maxApduLengthAccepted=1024,
-        segmentationSupported="segmentedBoth",
-        vendorIdentifier=999
+async def release_all_priorities(app, target_ip, obj_type, obj_inst, priorities=range(1, 17)):
+    # priorityArray는 읽기 전용이므로 presentValue에 우선순위별 NULL을 동시에 써서
+    # WritePropertyMultiple 하나로 묶음 (지원하지 않는 장치는 하나씩 전송)
+    priorities = list(priorities)
+    results = await asyncio.gather(
+        *[write_batched(app, target_ip, (obj_type, obj_inst), "presentValue", NULL_VALUE, p) for p in priorities]
     )
-    local_address = IPv4Address("200.0.0.234/24")
-    app = NormalApplication(device, local_address)
+    failed = [p for p, ok in zip(priorities, results) if not ok]
+    if failed:
+        logger.info(f"Release failed on {obj_type} {obj_inst} priorities {failed}")
+    else:
+        logger.info(f"Released priorities {priorities} on {obj_type} {obj_inst}")
+    return dict(zip(priorities, results))
 
-    await write_priority_null(
-        app,
-        target_ip="200.0.0.162",
-        obj_type="analogOutput",
-        obj_inst=1,
-        prop_id="presentValue",
-        priority_slot=2
-    )
+async def main():
+    # 공유 애플리케이션 사용 (종료 시 소켓 닫기)
+    async with app_session("LocalDevice") as app:
+        await write_priority_null(
+            app,
+            target_ip="200.0.0.162",
+            obj_type="analogOutput",
+            obj_inst=1,
+            prop_id="presentValue",
+            priority_slot=2
+        )
 
 if __name__ == "__main__":
+    # 모든 출력이 로거를 거치므로 콘솔 기록은 별도 스레드에서, uvloop이 있으면 사용
+    use_queued_logging()
+    install_uvloop()
     asyncio.run(main())
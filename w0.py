@@ -1,25 +1,32 @@
-import BAC0
 import asyncio
+from bacpypes3.primitivedata import Null
+from bacpypes3.constructeddata import Any
+from bacnet_utils import get_logger, use_queued_logging, app_session, install_uvloop, write_batched
 
-async def write_null_to_priority_async(ip, obj_type, obj_inst, priority):
+logger = get_logger(__name__)
+
+# 우선순위 해제용 NULL 값 (Null()은 인코딩되지 않으므로 빈 튜플로 생성)
+NULL_VALUE = Any(Null(()))
+
+async def write_null_to_priority_async(app, ip, obj_type, obj_inst, priority):
     try:
-        async with BAC0.connect(ip) as bacnet:
-            object_string = f"{obj_type} {obj_inst} at {ip}"
-            
-            print(f"✅ BACnet 통신 시작: {"200.0.0.234"}")
-            print(f"▶️ {object_string}의 우선순위 {priority}에 null 값 쓰기 요청...")
+        object_string = f"{obj_type} {obj_inst} at {ip}"
+
+        logger.info("✅ BACnet 통신 시작: 200.0.0.234")
+        logger.info(f"▶️ {object_string}의 우선순위 {priority}에 null 값 쓰기 요청...")
 
-            # await를 사용하여 비동기 write() 메서드가 완료될 때까지 기다립니다.
-            # 'None'을 전달하여 null 값을 입력합니다.
-            result = await bacnet.write(object_string, None, priority=priority)
+        # presentValue에 우선순위와 함께 NULL을 써서 해당 우선순위를 해제합니다.
+        result = await write_batched(app, ip, (obj_type, obj_inst), "presentValue", NULL_VALUE, priority)
 
-            print("---")
-            print(f"✅ 요청 성공: {object_string}의 우선순위 {priority}가 해제되었습니다.")
-            print(f"✅ 응답: {result}")
-            print("---")
+        if result:
+            logger.info("---")
+            logger.info(f"✅ 요청 성공: {object_string}의 우선순위 {priority}가 해제되었습니다.")
+            logger.info("---")
+        else:
+            logger.info(f"❌ 요청 실패: {object_string}의 우선순위 {priority}")
 
     except Exception as e:
-        print(f"❌ 오류 발생: {e}")
+        logger.info(f"❌ 오류 발생: {e}")
 
 async def main():
     DEVICE_IP = "200.0.0.162"
@@ -27,7 +34,12 @@ async def main():
     OBJECT_INSTANCE = 1
     TARGET_PRIORITY = 8
 
-    await write_null_to_priority_async(DEVICE_IP, OBJECT_TYPE, OBJECT_INSTANCE, TARGET_PRIORITY)
+    # 공유 애플리케이션 사용 (종료 시 소켓 닫기)
+    async with app_session("BACnet Null Writer") as app:
+        await write_null_to_priority_async(app, DEVICE_IP, OBJECT_TYPE, OBJECT_INSTANCE, TARGET_PRIORITY)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # 모든 출력이 로거를 거치므로 콘솔 기록은 별도 스레드에서, uvloop이 있으면 사용
+    use_queued_logging()
+    install_uvloop()
+    asyncio.run(main())